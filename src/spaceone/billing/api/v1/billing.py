@@ -1,7 +1,19 @@
+import time
+
 from spaceone.api.billing.v1 import billing_pb2, billing_pb2_grpc
 from spaceone.core.pygrpc import BaseAPI
 
 
+def _append_request_deadline(metadata, context):
+    """ Deadline(epoch seconds) of caller, plugin calls are timed out within it
+    """
+    metadata.pop('request_deadline', None)
+    time_remaining = context.time_remaining()
+    if time_remaining is not None:
+        metadata['request_deadline'] = time.time() + time_remaining
+    return metadata
+
+
 class Billing(BaseAPI, billing_pb2_grpc.BillingServicer):
 
     pb2 = billing_pb2
@@ -9,6 +21,8 @@ class Billing(BaseAPI, billing_pb2_grpc.BillingServicer):
 
     def get_data(self, request, context):
         params, metadata = self.parse_request(request, context)
+        metadata = _append_request_deadline(metadata, context)
 
         with self.locator.get_service('BillingService', metadata) as billing_service:
             return self.locator.get_info('BillingDataInfo', billing_service.get_data(params))
+
@@ -33,6 +33,8 @@ HANDLERS = {
 
 CONNECTORS = {
     'BillingPluginConnector': {
+        # threads waiting for plugin calls, shared by all endpoints in process
+        'max_call_workers': 100
     },
     'SpaceConnector': {
         'backend': 'spaceone.core.connector.space_connector.SpaceConnector',
@@ -46,6 +48,93 @@ CONNECTORS = {
     },
 }
 
+# Max number of concurrent plugin calls in Billing.get_data
+GET_DATA_MAX_WORKERS = 16
+
+# TTL(seconds) of identity snapshot (projects, service accounts) cache
+# it is not invalidated by changes in identity, so changes are seen within this TTL
+IDENTITY_CACHE_TTL = 300
+
+# Plugin endpoint of data source is cached in CACHES.default for ttl(seconds),
+# newer plugin version is upgraded in background, failed upgrade is retried after upgrade_retry_interval(seconds)
+PLUGIN_ENDPOINT_CACHE = {
+    'ttl': 300,
+    'upgrade_retry_interval': 600
+}
+
+# Process-local secret data cache of Billing.get_data (opt-in), data source register and verify are not cached
+SECRET_DATA_CACHE = {
+    'enabled': False,
+    'ttl': 60,
+    'max_size': 256
+}
+
+# Process-local LRU cache of plugin responses, in front of CACHES.default
+# Month is closed after closing_days from the end of month, closed_ttl 0 means no expiration
+# stale_window: expired data is served for stale_window(seconds) more, while refreshed in background
+# stats_log_interval: hit/miss counters of each tier are logged every stats_log_interval(seconds), 0 to disable
+PLUGIN_DATA_CACHE = {
+    'max_bytes': 134217728,
+    'local_ttl': 300,
+    'stats_log_interval': 300,
+    'open_ttl': 600,
+    'closed_ttl': 2592000,
+    'closing_days': 3,
+    'stale_window': 0
+}
+
+# Timeout(seconds) of plugin get_data, shortened to remaining deadline of request (minus deadline_margin)
+# Circuit breaker of each plugin endpoint is opened after failure_threshold consecutive timeouts
+# or connection errors, and calls are skipped for reset_timeout(seconds)
+# Concurrent calls of each plugin endpoint are limited by AIMD, limit grows on success
+# and is multiplied by backoff_ratio on timeouts or connection errors
+# max_concurrency: cap of concurrent plugin calls in worker, across all endpoints
+PLUGIN_GET_DATA = {
+    'timeout': 60,
+    'deadline_margin': 1,
+    'circuit_breaker': {
+        'failure_threshold': 5,
+        'reset_timeout': 30
+    },
+    'concurrency_limiter': {
+        'max_concurrency': 64,
+        'endpoint': {
+            'initial_limit': 8,
+            'min_limit': 1,
+            'max_limit': 32,
+            'backoff_ratio': 0.5
+        }
+    }
+}
+
+# Identical concurrent plugin fetches share one call in process,
+# distributed: also across workers by lock of CACHES.default
+PLUGIN_DATA_SINGLE_FLIGHT = {
+    'distributed': False,
+    'lock': {
+        'lock_timeout': 60,
+        'poll_interval': 0.5
+    }
+}
+
+# Serve already collected (closed) months of Billing.get_data from BillingData store
+BILLING_DATA_STORE_ENABLED = False
+
+# Background collector (CollectScheduler -> CollectorService)
+# months: recent months to collect, max_concurrency: plugin calls per domain,
+# jitter: max random delay(seconds) before each plugin call
+BILLING_COLLECTOR = {
+    'queue': 'collector_q',
+    'months': 3,
+    'granularity': ['MONTHLY'],
+    'plugin_aggregations': [[]],
+    'max_concurrency': 4,
+    'jitter': 10
+}
+
+# System token of scheduler
+TOKEN = ''
+
 INSTALLED_DATA_SOURCE_PLUGINS = [
     # {
     #     'name': '',
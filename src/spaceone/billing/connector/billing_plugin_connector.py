@@ -1,4 +1,7 @@
+import concurrent.futures
 import logging
+import threading
+import time
 
 from google.protobuf.json_format import MessageToDict
 
@@ -6,17 +9,37 @@ from spaceone.core.connector import BaseConnector
 from spaceone.core import pygrpc
 from spaceone.core.utils import parse_endpoint
 from spaceone.core.error import *
+from spaceone.billing.error import *
 
 __all__ = ['BillingPluginConnector']
 
 _LOGGER = logging.getLogger(__name__)
 
+DEFAULT_MAX_CALL_WORKERS = 100
+
+# gRPC sets these details with DEADLINE_EXCEEDED status, when deadline of call is exceeded
+_DEADLINE_EXCEEDED_DETAILS = 'Deadline Exceeded'
+
+_CALL_EXECUTOR = None
+_CALL_EXECUTOR_LOCK = threading.Lock()
+
+
+def _get_call_executor(max_workers):
+    global _CALL_EXECUTOR
+
+    with _CALL_EXECUTOR_LOCK:
+        if _CALL_EXECUTOR is None:
+            _CALL_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers,
+                                                                   thread_name_prefix='billing_plugin_call')
+        return _CALL_EXECUTOR
+
 
 class BillingPluginConnector(BaseConnector):
 
     def __init__(self, transaction, config):
         super().__init__(transaction, config)
         self.client = None
+        self.endpoint = None
 
     def initialize(self, endpoint):
         static_endpoint = self.config.get('endpoint')
@@ -25,10 +48,19 @@ class BillingPluginConnector(BaseConnector):
             endpoint = static_endpoint
 
         e = parse_endpoint(endpoint)
-        self.client = pygrpc.client(endpoint=f'{e.get("hostname")}:{e.get("port")}', version='plugin')
+        self.endpoint = f'{e.get("hostname")}:{e.get("port")}'
+        self.client = None
+
+    def _get_client(self):
+        """ Client is created (and checked ready) on first call, so connection errors are errors of the call
+        pygrpc keeps one client per endpoint in process, shared by all requests
+        """
+        if self.client is None:
+            self.client = pygrpc.client(endpoint=self.endpoint, version='plugin')
+        return self.client
 
     def init(self, options):
-        response = self.client.DataSource.init({
+        response = self._get_client().DataSource.init({
             'options': options,
         }, metadata=self.transaction.get_connection_meta())
 
@@ -46,9 +78,9 @@ class BillingPluginConnector(BaseConnector):
                 'schema': schema
             })
 
-        self.client.DataSource.verify(params, metadata=self.transaction.get_connection_meta())
+        self._get_client().DataSource.verify(params, metadata=self.transaction.get_connection_meta())
 
-    def get_data(self, schema, options, secret_data, filter, aggregation, start, end, granularity):
+    def get_data(self, schema, options, secret_data, filter, aggregation, start, end, granularity, timeout=None):
         params = {
             'options': options,
             'secret_data': secret_data,
@@ -65,9 +97,62 @@ class BillingPluginConnector(BaseConnector):
             })
 
         #_LOGGER.debug(f'[get_data] {params}')
-        responses = self.client.Billing.get_data(params, metadata=self.transaction.get_connection_meta())
-        return self._change_message(responses)
+        client = self._get_client()
+        metadata = self.transaction.get_connection_meta()
+
+        if timeout is None:
+            return self._change_billing_data_response(self._call_get_data(client, params, metadata))
+
+        # pygrpc retries connection errors with the same timeout, so the call is waited only until deadline
+        deadline = time.time() + timeout
+        executor = _get_call_executor(self.config.get('max_call_workers', DEFAULT_MAX_CALL_WORKERS))
+        future = executor.submit(self._call_get_data, client, params, metadata, deadline)
+        try:
+            responses = future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise ERROR_PLUGIN_TIMEOUT(endpoint=self.endpoint, timeout=timeout)
+
+        return self._change_billing_data_response(responses)
+
+    def _call_get_data(self, client, params, metadata, deadline=None):
+        timeout = None
+        if deadline is not None:
+            # call may wait for a worker, only remaining time is given to plugin
+            timeout = deadline - time.time()
+            if timeout <= 0:
+                raise ERROR_PLUGIN_TIMEOUT(endpoint=self.endpoint, timeout=0)
+
+        try:
+            return client.Billing.get_data(params, metadata=metadata, timeout=timeout)
+        except ERROR_INTERNAL_API as e:
+            # pygrpc keeps only details of gRPC status (except UNAVAILABLE and auth errors)
+            if e.message == _DEADLINE_EXCEEDED_DETAILS:
+                raise ERROR_PLUGIN_TIMEOUT(endpoint=self.endpoint, timeout=timeout)
+            raise e
 
     @staticmethod
     def _change_message(message):
         return MessageToDict(message, preserving_proto_field_name=True)
+
+    @staticmethod
+    def _change_billing_data_response(response):
+        """ MessageToDict of PluginBillingDataResponse, specialized for its fields
+        Fields are read directly instead of by reflection, same output except that cost 0 is kept
+        """
+        results = []
+        for billing_info in response.results:
+            billing_data = []
+            for data in billing_info.billing_data:
+                if data.currency:
+                    billing_data.append({'date': data.date, 'cost': data.cost, 'currency': data.currency})
+                else:
+                    # same as MessageToDict, default currency is applied by caller
+                    billing_data.append({'date': data.date, 'cost': data.cost})
+
+            result = {'resource_type': billing_info.resource_type, 'billing_data': billing_data}
+            if billing_info.name:
+                result['name'] = billing_info.name
+            results.append(result)
+
+        return {'results': results, 'total_count': response.total_count}
@@ -13,3 +13,19 @@ class ERROR_BILLING_AGGREGATION(ERROR_INVALID_ARGUMENT):
 class ERROR_BILLING_CREATE_RESULT(ERROR_INVALID_ARGUMENT):
     _message = 'failed to aggregate data, params={params}'
 
+class ERROR_PLUGIN_TIMEOUT(ERROR_BASE):
+    _status_code = 'DEADLINE_EXCEEDED'
+    _message = 'Plugin call is timed out. (endpoint = {endpoint}, timeout = {timeout})'
+
+class ERROR_PLUGIN_CIRCUIT_OPEN(ERROR_BASE):
+    _status_code = 'UNAVAILABLE'
+    _message = 'Plugin is skipped by repeated failures. (endpoint = {endpoint})'
+
+class ERROR_PLUGIN_THROTTLED(ERROR_BASE):
+    _status_code = 'UNAVAILABLE'
+    _message = 'Plugin call is throttled by concurrency limit. (endpoint = {endpoint})'
+
+class ERROR_REQUEST_DEADLINE_EXCEEDED(ERROR_BASE):
+    _status_code = 'DEADLINE_EXCEEDED'
+    _message = 'No time left for plugin call in request deadline.'
+
@@ -0,0 +1,51 @@
+import logging
+
+from spaceone.core import config
+from spaceone.core.scheduler import HourlyScheduler
+
+__all__ = ['CollectScheduler']
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CollectScheduler(HourlyScheduler):
+    """ Push CollectorService.create_collect_tasks every interval hours
+
+    application_scheduler:
+        QUEUES:
+            collector_q: {'backend': 'spaceone.core.queue.redis_queue.RedisQueue', ...}
+        SCHEDULERS:
+            billing_collect:
+                backend: spaceone.billing.interface.task.v1.collect_scheduler.CollectScheduler
+                queue: collector_q
+                interval: 1
+                minute: ':10'
+        WORKERS:
+            collector_worker:
+                backend: spaceone.core.scheduler.worker.BaseWorker
+                queue: collector_q
+                pool: 2
+        TOKEN: <system token>
+    """
+
+    def __init__(self, queue, interval, minute=':00'):
+        super().__init__(queue, interval, minute)
+
+    def create_task(self):
+        token = config.get_global('TOKEN')
+        if not token:
+            _LOGGER.error('[create_task] TOKEN is not configured, skip collecting')
+            return []
+
+        return [{
+            'name': 'billing_collect_schedule',
+            'version': 'v1',
+            'executionEngine': 'BaseWorker',
+            'stages': [{
+                'locator': 'SERVICE',
+                'name': 'CollectorService',
+                'metadata': {'token': token},
+                'method': 'create_collect_tasks',
+                'params': {'params': {}}
+            }]
+        }]
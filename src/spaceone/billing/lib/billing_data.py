@@ -0,0 +1,293 @@
+import logging
+import sys
+from array import array
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+__all__ = ['BillingDataBuilder', 'parse_resource_type']
+
+_LOGGER = logging.getLogger(__name__)
+
+# code of missing dimension value
+_MISSING = -1
+
+# distinct resource_types parsed in process
+_RESOURCE_TYPE_CACHE_SIZE = 65536
+
+
+def parse_resource_type(res_type):
+    """ Return dict
+    example
+    {
+        'resource_type': 'inventory.CloudService',
+        'identity.Provider': 'aws',
+        'inventory.Region': 'ap-northeast-2'
+        ...
+    }
+    """
+    return dict(_parse_resource_type_items(res_type))
+
+
+@lru_cache(maxsize=_RESOURCE_TYPE_CACHE_SIZE)
+def _parse_resource_type_items(res_type):
+    """ Memoized parse of resource_type, keys and values are interned
+
+    Returns:
+        (('resource_type', 'inventory.CloudService'), ('identity.Provider', 'aws'), ...)
+    """
+    item = res_type.split('?')
+    result = [('resource_type', sys.intern(item[0]))]
+    if len(item) > 1:
+        query = item[1].split('&')
+    else:
+        query = []
+    for q_item in query:
+        (a, b) = q_item.split('=')
+        result.append((sys.intern(a), sys.intern(b)))
+    return tuple(result)
+
+
+class BillingDataBuilder(object):
+    """ Columnar accumulator of plugin billing data
+
+    Each row is a resource_type of plugin response.
+    Dimensions (resource_type, identity.Provider, inventory.Region, identity.Project, ...) are
+    dictionary encoded to int codes, costs are kept as (row, date, cost) arrays.
+    Each distinct resource_type is parsed and encoded once, repeated rows reuse its codes.
+
+    If dimensions is given, other dimensions are dropped and rows with same dimension values
+    are combined when added (map-side combine), costs of combined rows are summed.
+
+    If mask is given ({dimension: [value, ...]}), only resource_types matched to all of it are added,
+    so masked dimensions need not be kept. resource_type without the dimension is not matched.
+
+    is_stale is True, if any response is served stale from plugin data cache.
+    skipped_sources are service accounts whose plugin call is failed.
+
+    to_dataframe() returns
+        resource_type(category) identity.Project(category) ... 2020-10(float) 2020-11(float) ...
+    """
+
+    def __init__(self, dimensions=None, mask=None):
+        self._dimensions = dimensions
+        self._mask = {dimension: set(values) for (dimension, values) in (mask or {}).items()}
+        self.is_stale = False
+        self.skipped_sources = []
+        self._row_count = 0
+        # dimension: array of codes (one per row)
+        self._dimension_codes = {}
+        # dimension: {value: code}
+        self._dimension_values = {}
+        # date: index
+        self._date_index = {}
+        self._cost_rows = array('q')
+        self._cost_dates = array('q')
+        self._costs = array('d')
+        # for map-side combine, (code, ...): row and (row, date index): position of cost
+        self._row_keys = {}
+        self._cost_positions = {}
+        # resource_type: ((dimension, code), ...)
+        self._resource_type_codes = {}
+        # resource_type: matched to mask
+        self._resource_type_matches = {}
+
+    def __len__(self):
+        return self._row_count
+
+    @property
+    def dates(self):
+        return list(self._date_index.keys())
+
+    def add_response(self, response, service_account_id, project_id):
+        """ Append plugin response
+        {
+            'results': [
+                {
+                    'resource_type': 'inventory.CloudService?identity.Provider=aws&inventory.Region=ap-northeast-2',
+                    'billing_data': [{'date': '2020-10', 'cost': 10, 'currency': 'USD'}, ...]
+                },
+                ...
+            ]
+        }
+        """
+        if response.get('is_stale', False):
+            self.is_stale = True
+
+        account_codes = tuple(self._encode_dimensions({'identity.Project': str(project_id),
+                                                       'identity.ServiceAccount': str(service_account_id)}))
+        for result in response.get('results', []):
+            if self._mask and not self._is_matched(result['resource_type']):
+                continue
+
+            codes = self._encode_resource_type(result['resource_type']) + account_codes
+            self._add_row_codes(codes, result.get('billing_data', []))
+
+    def add_skipped_source(self, service_account_id, error_code):
+        self.skipped_sources.append({'service_account_id': service_account_id, 'error_code': error_code})
+
+    def add_row(self, dimensions, billing_data):
+        self._add_row_codes(self._encode_dimensions(dimensions), billing_data)
+
+    def _add_row_codes(self, codes, billing_data):
+        """
+        codes: [(dimension, code), ...], encoded by _encode_dimensions()
+        """
+        if self._dimensions is not None:
+            self._add_combined_row(codes, billing_data)
+            return
+
+        row = self._row_count
+        for dimension, code in codes:
+            self._dimension_codes[dimension].append(code)
+
+        self._row_count += 1
+        self._pad_dimensions()
+
+        for billing_info in billing_data:
+            self._cost_rows.append(row)
+            self._cost_dates.append(self._get_date_index(billing_info['date']))
+            self._costs.append(billing_info.get('cost', 0))
+
+    def _add_combined_row(self, codes, billing_data):
+        codes = dict(codes)
+        row_key = tuple([codes.get(dimension, _MISSING) for dimension in self._dimensions])
+
+        row = self._row_keys.get(row_key)
+        if row is None:
+            row = self._row_count
+            self._row_keys[row_key] = row
+            for dimension, code in zip(self._dimensions, row_key):
+                if code != _MISSING:
+                    self._dimension_codes[dimension].append(code)
+
+            self._row_count += 1
+            self._pad_dimensions()
+
+        for billing_info in billing_data:
+            date_index = self._get_date_index(billing_info['date'])
+            position = self._cost_positions.get((row, date_index))
+            if position is None:
+                self._cost_positions[(row, date_index)] = len(self._costs)
+                self._cost_rows.append(row)
+                self._cost_dates.append(date_index)
+                self._costs.append(billing_info.get('cost', 0))
+            else:
+                self._costs[position] += billing_info.get('cost', 0)
+
+    def extend(self, builder):
+        """ Append all rows of other builder
+        Rows are not combined, same dimension values are merged by groupby of to_dataframe()
+        """
+        self.is_stale = self.is_stale or builder.is_stale
+        self.skipped_sources.extend(builder.skipped_sources)
+        if len(builder) == 0:
+            return
+
+        row_offset = self._row_count
+        for dimension, other_codes in builder._dimension_codes.items():
+            codes = self._get_codes(dimension)
+            # code of other builder -> code of this builder, last item is for _MISSING
+            code_map = np.array([self._encode(dimension, value) for value in builder._dimension_values[dimension]]
+                                + [_MISSING], dtype=np.int64)
+            codes.frombytes(code_map[np.frombuffer(other_codes, dtype=np.int64)].tobytes())
+
+        self._row_count += builder._row_count
+        self._pad_dimensions()
+
+        date_map = np.array([self._get_date_index(date) for date in builder._date_index], dtype=np.int64)
+        self._cost_rows.frombytes((np.frombuffer(builder._cost_rows, dtype=np.int64) + row_offset).tobytes())
+        self._cost_dates.frombytes(date_map[np.frombuffer(builder._cost_dates, dtype=np.int64)].tobytes())
+        self._costs.extend(builder._costs)
+
+    def to_dataframe(self):
+        if self._row_count == 0:
+            return pd.DataFrame()
+
+        data = {}
+        for dimension, codes in self._dimension_codes.items():
+            data[dimension] = self._make_categorical(dimension, codes)
+
+        cost_matrix = np.zeros((self._row_count, len(self._date_index)), dtype=np.float64)
+        np.add.at(cost_matrix,
+                  (np.frombuffer(self._cost_rows, dtype=np.int64), np.frombuffer(self._cost_dates, dtype=np.int64)),
+                  np.frombuffer(self._costs, dtype=np.float64))
+
+        for date, index in self._date_index.items():
+            data[date] = cost_matrix[:, index]
+
+        return pd.DataFrame(data)
+
+    def _make_categorical(self, dimension, codes):
+        """ Categories are sorted, so groupby has same order with plain string columns
+        Missing value is 0 (same as DataFrame.fillna(0))
+        """
+        categories = list(self._dimension_values[dimension].keys())
+        codes = np.frombuffer(codes, dtype=np.int64)
+
+        order = sorted(range(len(categories)), key=lambda idx: categories[idx])
+        code_map = np.empty(len(categories) + 1, dtype=np.int64)
+        code_map[order] = np.arange(len(categories))
+        sorted_categories = [categories[idx] for idx in order]
+
+        if (codes == _MISSING).any():
+            code_map[_MISSING] = len(sorted_categories)
+            sorted_categories.append(0)
+        else:
+            code_map[_MISSING] = _MISSING
+
+        return pd.Categorical.from_codes(code_map[codes], categories=sorted_categories)
+
+    def _encode_resource_type(self, res_type):
+        codes = self._resource_type_codes.get(res_type)
+        if codes is None:
+            codes = tuple(self._encode_dimensions(_parse_resource_type_items(res_type)))
+            self._resource_type_codes[res_type] = codes
+        return codes
+
+    def _is_matched(self, res_type):
+        is_matched = self._resource_type_matches.get(res_type)
+        if is_matched is None:
+            dimensions = dict(_parse_resource_type_items(res_type))
+            is_matched = all(dimensions.get(dimension) in values for (dimension, values) in self._mask.items())
+            self._resource_type_matches[res_type] = is_matched
+        return is_matched
+
+    def _encode_dimensions(self, dimensions):
+        """ Encode dimension values to int codes, dimensions out of self._dimensions are dropped
+
+        Returns:
+            [(dimension, code), ...]
+        """
+        if isinstance(dimensions, dict):
+            dimensions = dimensions.items()
+
+        codes = []
+        for dimension, value in dimensions:
+            if self._dimensions is None or dimension in self._dimensions:
+                self._get_codes(dimension)
+                codes.append((dimension, self._encode(dimension, value)))
+        return codes
+
+    def _get_codes(self, dimension):
+        if dimension not in self._dimension_codes:
+            self._dimension_codes[dimension] = array('q', [_MISSING]) * self._row_count
+            self._dimension_values[dimension] = {}
+        return self._dimension_codes[dimension]
+
+    def _encode(self, dimension, value):
+        values = self._dimension_values[dimension]
+        if value not in values:
+            values[value] = len(values)
+        return values[value]
+
+    def _get_date_index(self, date):
+        if date not in self._date_index:
+            self._date_index[date] = len(self._date_index)
+        return self._date_index[date]
+
+    def _pad_dimensions(self):
+        for codes in self._dimension_codes.values():
+            if len(codes) < self._row_count:
+                codes.extend(array('q', [_MISSING]) * (self._row_count - len(codes)))
@@ -0,0 +1,86 @@
+import logging
+import threading
+import time
+
+__all__ = ['CircuitBreaker', 'get_circuit_breaker']
+
+_LOGGER = logging.getLogger(__name__)
+
+_CIRCUIT_BREAKERS = {}
+_CIRCUIT_BREAKERS_LOCK = threading.Lock()
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30
+
+CLOSED = 'CLOSED'
+OPEN = 'OPEN'
+HALF_OPEN = 'HALF_OPEN'
+
+
+def get_circuit_breaker(endpoint, breaker_conf=None):
+    """ Process-wide circuit breaker of endpoint
+    breaker_conf (dict): {
+        'failure_threshold': 'int',
+        'reset_timeout': 'int (seconds)'
+    }
+    """
+    with _CIRCUIT_BREAKERS_LOCK:
+        if endpoint not in _CIRCUIT_BREAKERS:
+            breaker_conf = breaker_conf or {}
+            _CIRCUIT_BREAKERS[endpoint] = CircuitBreaker(
+                endpoint,
+                failure_threshold=breaker_conf.get('failure_threshold', DEFAULT_FAILURE_THRESHOLD),
+                reset_timeout=breaker_conf.get('reset_timeout', DEFAULT_RESET_TIMEOUT))
+
+        return _CIRCUIT_BREAKERS[endpoint]
+
+
+class CircuitBreaker(object):
+    """ Fail fast on endpoint with repeated errors (or timeouts)
+
+    CLOSED: calls are allowed, opened after failure_threshold consecutive failures
+    OPEN: calls are rejected for reset_timeout
+    HALF_OPEN: a single trial call is allowed, closed on success and opened again on failure
+    """
+
+    def __init__(self, endpoint, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self._failure_count = 0
+        self._opened_at = 0
+        self._lock = threading.Lock()
+
+    def is_open(self):
+        """ Calls are rejected now, without changing state
+        """
+        with self._lock:
+            return self.state == OPEN and time.time() - self._opened_at < self.reset_timeout
+
+    def allow_request(self):
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+
+            if self.state == OPEN and time.time() - self._opened_at >= self.reset_timeout:
+                _LOGGER.debug(f'[allow_request] half open: {self.endpoint}')
+                self.state = HALF_OPEN
+                return True
+
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self._failure_count = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failure_count += 1
+            if self.state == HALF_OPEN or self._failure_count >= self.failure_threshold:
+                if self.state != OPEN:
+                    _LOGGER.error(f'[record_failure] circuit opened: {self.endpoint} '
+                                  f'({self._failure_count} failures)')
+                self.state = OPEN
+                self._opened_at = time.time()
@@ -0,0 +1,111 @@
+import logging
+import threading
+import time
+
+__all__ = ['ConcurrencyLimiter', 'AdaptiveConcurrencyLimiter', 'get_concurrency_limiter',
+           'get_global_concurrency_limiter', 'SUCCESS', 'OVERLOADED', 'IGNORED']
+
+_LOGGER = logging.getLogger(__name__)
+
+_CONCURRENCY_LIMITERS = {}
+_GLOBAL_CONCURRENCY_LIMITER = None
+_CONCURRENCY_LIMITERS_LOCK = threading.Lock()
+
+DEFAULT_MAX_CONCURRENCY = 64
+DEFAULT_INITIAL_LIMIT = 8
+DEFAULT_MIN_LIMIT = 1
+DEFAULT_MAX_LIMIT = 32
+DEFAULT_BACKOFF_RATIO = 0.5
+
+# outcome of call, released to AdaptiveConcurrencyLimiter
+SUCCESS = 'SUCCESS'
+OVERLOADED = 'OVERLOADED'
+IGNORED = 'IGNORED'
+
+
+def get_global_concurrency_limiter(max_concurrency=DEFAULT_MAX_CONCURRENCY):
+    """ Process-wide cap of concurrent plugin calls, created by the first caller's configuration
+    """
+    global _GLOBAL_CONCURRENCY_LIMITER
+
+    if _GLOBAL_CONCURRENCY_LIMITER is None:
+        with _CONCURRENCY_LIMITERS_LOCK:
+            if _GLOBAL_CONCURRENCY_LIMITER is None:
+                _GLOBAL_CONCURRENCY_LIMITER = ConcurrencyLimiter(max_concurrency)
+
+    return _GLOBAL_CONCURRENCY_LIMITER
+
+
+def get_concurrency_limiter(endpoint, limiter_conf=None):
+    """ Process-wide adaptive limiter of endpoint
+    limiter_conf (dict): {
+        'initial_limit': 'int',
+        'min_limit': 'int',
+        'max_limit': 'int',
+        'backoff_ratio': 'float'
+    }
+    """
+    with _CONCURRENCY_LIMITERS_LOCK:
+        if endpoint not in _CONCURRENCY_LIMITERS:
+            _CONCURRENCY_LIMITERS[endpoint] = AdaptiveConcurrencyLimiter(endpoint, **(limiter_conf or {}))
+
+        return _CONCURRENCY_LIMITERS[endpoint]
+
+
+class ConcurrencyLimiter(object):
+    """ At most limit calls in flight, others wait in acquire()
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, timeout=None):
+        """
+        Returns:
+            bool, False if not acquired in timeout
+        """
+        deadline = time.time() + timeout if timeout is not None else None
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                remaining = deadline - time.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+
+            self.in_flight += 1
+            return True
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+
+class AdaptiveConcurrencyLimiter(ConcurrencyLimiter):
+    """ AIMD (additive increase, multiplicative decrease) limit of endpoint
+
+    SUCCESS: limit += 1 / limit (about +1 per round of limit calls), up to max_limit
+    OVERLOADED (timeout, connection error): limit *= backoff_ratio, down to min_limit
+    IGNORED (throttled, other errors): limit is not changed
+    """
+
+    def __init__(self, endpoint, initial_limit=DEFAULT_INITIAL_LIMIT, min_limit=DEFAULT_MIN_LIMIT,
+                 max_limit=DEFAULT_MAX_LIMIT, backoff_ratio=DEFAULT_BACKOFF_RATIO):
+        super().__init__(initial_limit)
+        self.endpoint = endpoint
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+
+    def release(self, outcome=IGNORED):
+        with self._condition:
+            self.in_flight -= 1
+            if outcome == OVERLOADED:
+                self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+                _LOGGER.debug(f'[release] decrease limit of {self.endpoint}: {self.limit:.2f}')
+            elif outcome == SUCCESS:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+            self._condition.notify_all()
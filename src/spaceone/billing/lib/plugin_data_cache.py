@@ -0,0 +1,186 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from spaceone.core import cache
+
+__all__ = ['PluginDataCache', 'get_plugin_data_cache']
+
+_LOGGER = logging.getLogger(__name__)
+
+_PLUGIN_DATA_CACHE = None
+_PLUGIN_DATA_CACHE_LOCK = threading.Lock()
+
+DEFAULT_MAX_BYTES = 128 * 1024 * 1024
+DEFAULT_LOCAL_TTL = 300
+DEFAULT_STATS_LOG_INTERVAL = 300
+
+
+def get_plugin_data_cache(cache_conf=None):
+    """ Process-wide plugin data cache
+    cache_conf (dict): {
+        'max_bytes': 'int',
+        'local_ttl': 'int (seconds)',
+        'stats_log_interval': 'int (seconds)'
+    }
+    """
+    global _PLUGIN_DATA_CACHE
+
+    if _PLUGIN_DATA_CACHE is None:
+        with _PLUGIN_DATA_CACHE_LOCK:
+            if _PLUGIN_DATA_CACHE is None:
+                cache_conf = cache_conf or {}
+                _PLUGIN_DATA_CACHE = PluginDataCache(max_bytes=cache_conf.get('max_bytes', DEFAULT_MAX_BYTES),
+                                                     local_ttl=cache_conf.get('local_ttl', DEFAULT_LOCAL_TTL),
+                                                     stats_log_interval=cache_conf.get('stats_log_interval',
+                                                                                       DEFAULT_STATS_LOG_INTERVAL))
+
+    return _PLUGIN_DATA_CACHE
+
+
+class PluginDataCache(object):
+    """ Two-tier cache of plugin responses
+
+    1st tier: in-process LRU, bounded by total bytes of (json encoded) values
+    2nd tier: shared cache backend (CACHES.default)
+
+    get() reads through 1st -> 2nd tier, set() writes through both tiers.
+    Values of 1st tier are shared by callers, do not modify them.
+    Size of value is measured once by set(), and kept with the value in 2nd tier.
+    Hit/miss counters of each tier are logged every stats_log_interval seconds (0: not logged).
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, local_ttl=DEFAULT_LOCAL_TTL,
+                 stats_log_interval=DEFAULT_STATS_LOG_INTERVAL):
+        self.max_bytes = max_bytes
+        self.local_ttl = local_ttl
+        self.stats_log_interval = stats_log_interval
+        self._stats_logged_at = time.time()
+        # key: (expired_at, size, value)
+        self._items = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'local': {'hit': 0, 'miss': 0},
+            'shared': {'hit': 0, 'miss': 0}
+        }
+
+    def get(self, key):
+        value = self._get_local(key)
+        if value is not None:
+            self._count('local', 'hit')
+            return value
+
+        self._count('local', 'miss')
+
+        if not cache.is_set():
+            return None
+
+        item = cache.get(key)
+        if not isinstance(item, dict) or 'value' not in item:
+            self._count('shared', 'miss')
+            return None
+
+        self._count('shared', 'hit')
+        # local copy does not outlive the shared one
+        self._set_local(key, item['value'], item.get('size', 0), self._get_shared_ttl(key))
+        return item['value']
+
+    def set(self, key, value, expire=None):
+        size = len(json.dumps(value))
+        self._set_local(key, value, size, expire)
+
+        if cache.is_set():
+            cache.set(key, {'size': size, 'value': value}, expire=expire)
+
+    def delete(self, key):
+        with self._lock:
+            self._delete_local(key)
+
+        if cache.is_set():
+            cache.delete(key)
+
+    def get_stats(self):
+        """
+        return:
+        {
+            'local': {'hit': 'int', 'miss': 'int'},
+            'shared': {'hit': 'int', 'miss': 'int'},
+            'local_bytes': 'int',
+            'local_count': 'int'
+        }
+        """
+        with self._lock:
+            stats = {tier: counter.copy() for (tier, counter) in self._stats.items()}
+            stats['local_bytes'] = self._size
+            stats['local_count'] = len(self._items)
+            return stats
+
+    @staticmethod
+    def _get_shared_ttl(key):
+        """ Remaining seconds of key in shared tier, None if no expiration (or unknown)
+        """
+        try:
+            ttl = cache.ttl(key)
+        except Exception as e:
+            _LOGGER.debug(f'[_get_shared_ttl] cache.ttl is not supported: {e}')
+            return None
+
+        if ttl is None or ttl == -1:
+            # no expiration
+            return None
+
+        # expired just after read (-2) or in less than a second, hardly kept in local tier
+        return max(ttl, 0.001)
+
+    def _get_local(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+
+            (expired_at, size, value) = item
+            if expired_at < time.time():
+                self._delete_local(key)
+                return None
+
+            self._items.move_to_end(key)
+            return value
+
+    def _set_local(self, key, value, size, expire=None):
+        if size > self.max_bytes:
+            return
+
+        ttl = self.local_ttl
+        if expire and 0 < expire < ttl:
+            ttl = expire
+
+        with self._lock:
+            self._delete_local(key)
+            self._items[key] = (time.time() + ttl, size, value)
+            self._size += size
+
+            while self._size > self.max_bytes:
+                self._delete_local(next(iter(self._items)))
+
+    def _delete_local(self, key):
+        item = self._items.pop(key, None)
+        if item:
+            self._size -= item[1]
+
+    def _count(self, tier, result):
+        with self._lock:
+            self._stats[tier][result] += 1
+
+        self._log_stats()
+
+    def _log_stats(self):
+        now = time.time()
+        with self._lock:
+            if not self.stats_log_interval or now - self._stats_logged_at < self.stats_log_interval:
+                return
+            self._stats_logged_at = now
+
+        _LOGGER.info(f'[PluginDataCache] stats: {self.get_stats()}')
@@ -0,0 +1,95 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+__all__ = ['SecretDataCache', 'get_secret_data_cache']
+
+_LOGGER = logging.getLogger(__name__)
+
+_SECRET_DATA_CACHE = None
+_SECRET_DATA_CACHE_LOCK = threading.Lock()
+
+DEFAULT_TTL = 60
+DEFAULT_MAX_SIZE = 256
+
+
+def get_secret_data_cache(cache_conf=None):
+    """ Process-wide secret data cache
+    cache_conf (dict): {
+        'ttl': 'int (seconds)',
+        'max_size': 'int'
+    }
+    """
+    global _SECRET_DATA_CACHE
+
+    if _SECRET_DATA_CACHE is None:
+        with _SECRET_DATA_CACHE_LOCK:
+            if _SECRET_DATA_CACHE is None:
+                cache_conf = cache_conf or {}
+                _SECRET_DATA_CACHE = SecretDataCache(ttl=cache_conf.get('ttl', DEFAULT_TTL),
+                                                     max_size=cache_conf.get('max_size', DEFAULT_MAX_SIZE))
+
+    return _SECRET_DATA_CACHE
+
+
+class SecretDataCache(object):
+    """ Process-local LRU cache of secret data, keyed by (domain_id, secret_id)
+
+    Secret data is never written to the shared cache backend.
+    Values are kept as encoded bytearray, which is overwritten with zeros when evicted.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, max_size=DEFAULT_MAX_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        # (domain_id, secret_id): (expired_at, bytearray)
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, domain_id, secret_id):
+        key = (domain_id, secret_id)
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+
+            (expired_at, encoded) = item
+            if expired_at < time.time():
+                self._evict(key)
+                return None
+
+            self._items.move_to_end(key)
+            return json.loads(encoded.decode())
+
+    def set(self, domain_id, secret_id, secret_data):
+        key = (domain_id, secret_id)
+        encoded = bytearray(json.dumps(secret_data).encode())
+        now = time.time()
+        with self._lock:
+            self._evict_expired(now)
+            if key in self._items:
+                self._evict(key)
+
+            self._items[key] = (now + self.ttl, encoded)
+            while len(self._items) > self.max_size:
+                self._evict(next(iter(self._items)))
+
+    def delete(self, domain_id, secret_id):
+        with self._lock:
+            if (domain_id, secret_id) in self._items:
+                self._evict((domain_id, secret_id))
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._items.keys()):
+                self._evict(key)
+
+    def _evict_expired(self, now):
+        for key in [key for (key, (expired_at, encoded)) in self._items.items() if expired_at < now]:
+            self._evict(key)
+
+    def _evict(self, key):
+        (expired_at, encoded) = self._items.pop(key)
+        encoded[:] = bytes(len(encoded))
@@ -0,0 +1,111 @@
+import logging
+import threading
+import time
+
+from spaceone.core import cache
+
+__all__ = ['SingleFlight', 'CacheLock']
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_LOCK_TIMEOUT = 60
+DEFAULT_POLL_INTERVAL = 0.5
+
+
+class _Call(object):
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """ Only one in-flight call per key in process
+    Other callers of same key wait for the call (at most wait_timeout), and share its result (or exception)
+    """
+
+    def __init__(self):
+        # key: _Call
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args, wait_timeout=None, **kwargs):
+        """
+        Raises:
+            TimeoutError, if in-flight call of other caller is not done in wait_timeout
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not is_leader:
+            _LOGGER.debug(f'[do] wait in-flight call: {key}')
+            if not call.event.wait(wait_timeout):
+                raise TimeoutError(f'in-flight call is not done in {wait_timeout} seconds: {key}')
+            if call.error:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise e
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+
+class CacheLock(object):
+    """ Lock across workers by cache backend (CACHES.default)
+    Lock expires after lock_timeout, if the holder is gone
+    """
+
+    def __init__(self, key, lock_timeout=DEFAULT_LOCK_TIMEOUT, poll_interval=DEFAULT_POLL_INTERVAL):
+        self.key = f'{key}:lock'
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self.is_acquired = False
+
+    def acquire(self):
+        if not cache.is_set():
+            self.is_acquired = True
+            return True
+
+        if cache.increment(self.key) == 1:
+            cache.set(self.key, 1, expire=self.lock_timeout)
+            self.is_acquired = True
+        elif cache.ttl(self.key) == -1:
+            # holder is gone before setting expiration
+            cache.set(self.key, 1, expire=self.lock_timeout)
+
+        return self.is_acquired
+
+    def release(self):
+        if self.is_acquired and cache.is_set():
+            cache.delete(self.key)
+        self.is_acquired = False
+
+    def wait(self, is_done, timeout=None):
+        """ Wait until is_done() returns True, or lock is released (or expired)
+
+        Returns:
+            bool, is_done() before lock_timeout (or timeout, if shorter)
+        """
+        deadline = time.time() + (self.lock_timeout if timeout is None else min(self.lock_timeout, timeout))
+        while time.time() < deadline:
+            if is_done():
+                return True
+
+            if cache.get(self.key) is None:
+                return is_done()
+
+            time.sleep(self.poll_interval)
+
+        return False
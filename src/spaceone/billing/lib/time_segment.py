@@ -0,0 +1,143 @@
+import logging
+from datetime import datetime
+
+from dateutil.parser import parse
+from dateutil.relativedelta import relativedelta
+
+__all__ = ['make_segments', 'group_contiguous_segments', 'split_response', 'merge_responses', 'get_segment_expire',
+           'is_closed_segment']
+
+_LOGGER = logging.getLogger(__name__)
+
+# granularity which is cached by calendar month
+SEGMENTED_GRANULARITY = ['MONTHLY', 'DAILY']
+
+DEFAULT_OPEN_TTL = 600
+DEFAULT_CLOSED_TTL = 2592000
+DEFAULT_CLOSING_DAYS = 3
+
+
+def make_segments(start, end, granularity):
+    """ Split [start, end] to calendar months
+
+    Args:
+        start: 'yyyy-mm-dd'
+        end: 'yyyy-mm-dd'
+        granularity: 'MONTHLY' | 'DAILY' | ...
+
+    Returns:
+        [('2020-10-15', '2020-10-31'), ('2020-11-01', '2020-11-30'), ('2020-12-01', '2020-12-17')]
+    """
+    if granularity not in SEGMENTED_GRANULARITY:
+        return [(start, end)]
+
+    start_date = parse(start)
+    end_date = parse(end)
+
+    segments = []
+    segment_start = start_date
+    while segment_start <= end_date:
+        segment_end = min(segment_start + relativedelta(day=31), end_date)
+        segments.append((segment_start.strftime('%Y-%m-%d'), segment_end.strftime('%Y-%m-%d')))
+        segment_start = segment_start + relativedelta(months=1, day=1)
+
+    return segments
+
+
+def group_contiguous_segments(segments):
+    """ Group adjacent segments, so one plugin call fetches one group
+
+    Args:
+        segments: sorted list of (start, end)
+
+    Returns:
+        [[(start, end), ...], ...]
+    """
+    groups = []
+    for segment in segments:
+        if groups and parse(groups[-1][-1][1]) + relativedelta(days=1) == parse(segment[0]):
+            groups[-1].append(segment)
+        else:
+            groups.append([segment])
+    return groups
+
+
+def split_response(response, segments):
+    """ Split plugin response by segments, billing_data is assigned by month of date
+    Single segment (also not segmented granularity, ex. YEARLY) is the response itself
+
+    Returns:
+        {(start, end): response}
+    """
+    if len(segments) == 1:
+        return {segments[0]: response}
+
+    segment_by_month = {segment[0][:7]: segment for segment in segments}
+    split_results = {segment: {} for segment in segments}
+
+    for result in response.get('results', []):
+        for billing_info in result.get('billing_data', []):
+            segment = segment_by_month.get(billing_info['date'][:7])
+            if segment is None:
+                _LOGGER.debug(f'[split_response] out of segments: {billing_info["date"]}')
+                continue
+
+            segment_result = split_results[segment].setdefault(result['resource_type'], {
+                'resource_type': result['resource_type'],
+                'billing_data': []
+            })
+            segment_result['billing_data'].append(billing_info)
+
+    return {segment: {'results': list(results.values()), 'total_count': len(results)}
+            for (segment, results) in split_results.items()}
+
+
+def merge_responses(responses):
+    """ Stitch responses of segments, billing_data of same resource_type is concatenated
+    """
+    merged_results = {}
+    for response in responses:
+        for result in response.get('results', []):
+            merged_result = merged_results.setdefault(result['resource_type'], {
+                'resource_type': result['resource_type'],
+                'billing_data': []
+            })
+            merged_result['billing_data'].extend(result.get('billing_data', []))
+
+    return {'results': list(merged_results.values()), 'total_count': len(merged_results)}
+
+
+def get_segment_expire(segment, ttl_conf=None, now=None):
+    """ Cache TTL of segment by age
+
+    Billing period is closed after closing_days from the end of month,
+    data of closed period is final, so it is cached for closed_ttl (None or 0: no expiration).
+    Open period (current month, or just finished month) is cached for open_ttl.
+
+    Args:
+        segment: (start, end)
+        ttl_conf: {
+            'open_ttl': 'int (seconds)',
+            'closed_ttl': 'int (seconds)',
+            'closing_days': 'int'
+        }
+
+    Returns:
+        int or None
+    """
+    ttl_conf = ttl_conf or {}
+    if not is_closed_segment(segment, ttl_conf, now):
+        return ttl_conf.get('open_ttl', DEFAULT_OPEN_TTL)
+
+    return ttl_conf.get('closed_ttl', DEFAULT_CLOSED_TTL) or None
+
+
+def is_closed_segment(segment, ttl_conf=None, now=None):
+    """ Billing period of segment is closed after closing_days from the end of month
+    """
+    ttl_conf = ttl_conf or {}
+    now = now or datetime.utcnow()
+
+    closed_at = parse(segment[1]) + relativedelta(months=1, day=1,
+                                                  days=ttl_conf.get('closing_days', DEFAULT_CLOSING_DAYS))
+    return now >= closed_at
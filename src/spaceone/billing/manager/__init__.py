@@ -3,4 +3,5 @@ from spaceone.billing.manager.repository_manager import RepositoryManager
 from spaceone.billing.manager.secret_manager import SecretManager
 from spaceone.billing.manager.plugin_manager import PluginManager
 from spaceone.billing.manager.data_source_manager import DataSourceManager
+from spaceone.billing.manager.billing_data_manager import BillingDataManager
 
@@ -0,0 +1,159 @@
+import logging
+
+from spaceone.core.manager import BaseManager
+from spaceone.billing.model.billing_data_model import BillingData, BillingDataPeriod
+from spaceone.billing.lib.billing_data import parse_resource_type
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class BillingDataManager(BaseManager):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.billing_data_model: BillingData = self.locator.get_model('BillingData')
+        self.billing_data_period_model: BillingDataPeriod = self.locator.get_model('BillingDataPeriod')
+
+    def save_billing_data(self, response, secret, data_source_id, granularity, month, is_closed, domain_id):
+        """ Replace billing data of month by plugin response
+        Billing data is kept by (data_source_id, secret_id), secret may be used by several data sources
+
+        Args:
+            response: plugin response of whole month
+            secret: {'secret_id': 'str', 'service_account_id': 'str', 'project_id': 'str'}
+            month: 'yyyy-mm'
+            is_closed: bool, billing data of closed month is final
+        """
+        secret_id = secret['secret_id']
+        self.billing_data_model.filter(domain_id=domain_id, data_source_id=data_source_id, secret_id=secret_id,
+                                       granularity=granularity, month=month).delete()
+
+        billing_data_vos = []
+        for result in response.get('results', []):
+            dimensions = parse_resource_type(result['resource_type'])
+            for billing_info in result.get('billing_data', []):
+                if billing_info['date'][:7] != month:
+                    continue
+
+                billing_data_vos.append(self.billing_data_model(
+                    cost=billing_info.get('cost', 0),
+                    currency=billing_info.get('currency', 'USD'),
+                    date=billing_info['date'],
+                    month=month,
+                    granularity=granularity,
+                    resource_type=dimensions['resource_type'],
+                    provider=dimensions.get('identity.Provider'),
+                    region_code=dimensions.get('inventory.Region'),
+                    service_code=dimensions.get('inventory.CloudServiceType'),
+                    project_id=secret.get('project_id'),
+                    service_account_id=secret.get('service_account_id'),
+                    secret_id=secret_id,
+                    data_source_id=data_source_id,
+                    domain_id=domain_id
+                ))
+
+        if len(billing_data_vos) > 0:
+            self.billing_data_model.objects.insert(billing_data_vos, load_bulk=False)
+
+        self._save_billing_data_period(secret, data_source_id, granularity, month, is_closed, domain_id)
+        _LOGGER.debug(f'[save_billing_data] {secret_id} ({granularity}, {month}): {len(billing_data_vos)} items')
+
+    def list_collected_secrets(self, data_source_ids, secret_ids, granularity, months, domain_id):
+        """ Secrets of data sources whose all months are collected after closed
+
+        Returns:
+            set of (data_source_id, secret_id)
+        """
+        query = {
+            'filter': [
+                {'k': 'domain_id', 'v': domain_id, 'o': 'eq'},
+                {'k': 'data_source_id', 'v': data_source_ids, 'o': 'in'},
+                {'k': 'secret_id', 'v': secret_ids, 'o': 'in'},
+                {'k': 'granularity', 'v': granularity, 'o': 'eq'},
+                {'k': 'month', 'v': months, 'o': 'in'},
+                {'k': 'is_closed', 'v': True, 'o': 'eq'}
+            ],
+            'aggregate': [{
+                'group': {
+                    'keys': [{'key': 'data_source_id', 'name': 'data_source_id'},
+                             {'key': 'secret_id', 'name': 'secret_id'}],
+                    'fields': [{'operator': 'count', 'name': 'count'}]
+                }
+            }]
+        }
+        response = self.billing_data_period_model.stat(**query)
+        return set([(result['data_source_id'], result['secret_id']) for result in response.get('results', [])
+                    if result['count'] == len(months)])
+
+    def list_closed_months(self, data_source_id, secret_id, granularity, months, domain_id):
+        """ Months of secret in data source, which are collected after closed
+
+        Returns:
+            set of month
+        """
+        billing_data_period_vos = self.billing_data_period_model.filter(domain_id=domain_id,
+                                                                        data_source_id=data_source_id,
+                                                                        secret_id=secret_id,
+                                                                        granularity=granularity, month=months,
+                                                                        is_closed=True)
+        return set([billing_data_period_vo.month for billing_data_period_vo in billing_data_period_vos])
+
+    def analyze_billing_data(self, data_source_id, secret_ids, group_by, granularity, start, end, domain_id,
+                             filter=None):
+        """ Sum of cost by group_by fields and date, of secrets in data source
+
+        Args:
+            group_by: list of BillingData fields, ex) ['project_id', 'region_code']
+            start: 'yyyy-mm-dd'
+            end: 'yyyy-mm-dd'
+            filter: {BillingData field: [value, ...]}, ex) {'region_code': ['ap-northeast-2']}
+
+        Returns:
+            [{'resource_type': 'str', 'project_id': 'str', ..., 'date': 'str', 'cost': 'float'}, ...]
+        """
+        if granularity == 'MONTHLY':
+            start = start[:7]
+            end = end[:7]
+
+        group_keys = [{'key': key, 'name': key} for key in ['resource_type'] + group_by + ['date']]
+        query = {
+            'filter': [
+                {'k': 'domain_id', 'v': domain_id, 'o': 'eq'},
+                {'k': 'granularity', 'v': granularity, 'o': 'eq'},
+                {'k': 'data_source_id', 'v': data_source_id, 'o': 'eq'},
+                {'k': 'secret_id', 'v': secret_ids, 'o': 'in'},
+                {'k': 'date', 'v': start, 'o': 'gte'},
+                {'k': 'date', 'v': end, 'o': 'lte'}
+            ] + [{'k': key, 'v': values, 'o': 'in'} for (key, values) in (filter or {}).items()],
+            'aggregate': [{
+                'group': {
+                    'keys': group_keys,
+                    'fields': [{'key': 'cost', 'name': 'cost', 'operator': 'sum'}]
+                }
+            }]
+        }
+        response = self.billing_data_model.stat(**query)
+        return response.get('results', [])
+
+    def delete_billing_data_by_data_source_id(self, data_source_id, domain_id):
+        self.billing_data_model.filter(data_source_id=data_source_id, domain_id=domain_id).delete()
+        self.billing_data_period_model.filter(data_source_id=data_source_id, domain_id=domain_id).delete()
+
+    def _save_billing_data_period(self, secret, data_source_id, granularity, month, is_closed, domain_id):
+        billing_data_period_vo = self.billing_data_period_model.filter(domain_id=domain_id,
+                                                                       data_source_id=data_source_id,
+                                                                       secret_id=secret['secret_id'],
+                                                                       granularity=granularity,
+                                                                       month=month).first()
+        if billing_data_period_vo:
+            billing_data_period_vo.update({'is_closed': is_closed})
+        else:
+            self.billing_data_period_model.create({
+                'month': month,
+                'granularity': granularity,
+                'is_closed': is_closed,
+                'service_account_id': secret.get('service_account_id'),
+                'secret_id': secret['secret_id'],
+                'data_source_id': data_source_id,
+                'domain_id': domain_id
+            })
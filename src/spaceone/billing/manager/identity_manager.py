@@ -1,5 +1,9 @@
+import hashlib
+import json
 import logging
 
+from spaceone.core import cache
+from spaceone.core import config
 from spaceone.core.manager import BaseManager
 from spaceone.core.connector.space_connector import SpaceConnector
 
@@ -14,6 +18,8 @@ _GET_RESOURCE_METHODS = {
         'key': 'service_account_id'
     },
 }
+DEFAULT_IDENTITY_CACHE_TTL = 300
+
 
 class IdentityManager(BaseManager):
 
@@ -30,9 +36,22 @@ class IdentityManager(BaseManager):
         return None
 
     def check_project(self, project_id, domain_id):
-        return self.identity_connector.dispatch('Project.get', {'project_id': project_id, 'domain_id': domain_id})
+        return self._get_identity_cache(f'project:{project_id}', domain_id,
+                                        self.identity_connector.dispatch,
+                                        'Project.get', {'project_id': project_id, 'domain_id': domain_id})
 
     def list_projects_by_project_group_id(self, project_group_id, domain_id):
+        return self._get_identity_cache(f'project-group:{project_group_id}', domain_id,
+                                        self._list_projects_by_project_group_id, project_group_id, domain_id)
+
+    def list_all_projects(self, domain_id):
+        return self._get_identity_cache('projects', domain_id, self._list_all_projects, domain_id)
+
+    def list_service_accounts_by_provider(self, provider, domain_id):
+        return self._get_identity_cache(f'service-accounts:{provider}', domain_id,
+                                        self._list_service_accounts_by_provider, provider, domain_id)
+
+    def _list_projects_by_project_group_id(self, project_group_id, domain_id):
         response = self.identity_connector.dispatch('ProjectGroup.list_projects',
                                                     {'project_group_id': project_group_id,
                                                      'recursive': True,
@@ -45,7 +64,7 @@ class IdentityManager(BaseManager):
                 project_list.append(result['project_id'])
         return project_list
 
-    def list_all_projects(self, domain_id):
+    def _list_all_projects(self, domain_id):
         response = self.identity_connector.dispatch('Project.list',
                                                     {'query': {'only': ['project_id']},
                                                      'domain_id':domain_id})
@@ -56,10 +75,44 @@ class IdentityManager(BaseManager):
                 project_list.append(result['project_id'])
         return project_list
 
-    def list_service_accounts_by_provider(self, provider, domain_id):
+    def _list_service_accounts_by_provider(self, provider, domain_id):
         response = self.identity_connector.dispatch('ServiceAccount.list',
                                                     {'provider': provider, 'domain_id': domain_id})
 
-        if 'results' in response:
-            return response['results']
-        return []
+        # keep only service_account_id and project_id in snapshot
+        service_accounts = []
+        for result in response.get('results', []):
+            service_accounts.append({
+                'service_account_id': result['service_account_id'],
+                'project_info': {'project_id': result.get('project_info', {}).get('project_id')}
+            })
+        return service_accounts
+
+    def _get_identity_cache(self, key, domain_id, func, *args):
+        """ Per-domain identity snapshot, cached for IDENTITY_CACHE_TTL seconds
+        Identity filters results by caller's token, so snapshot is shared only by callers of same scope
+        Changes of projects and service accounts are not notified to billing,
+        so they are seen after the snapshot is expired (at most IDENTITY_CACHE_TTL seconds)
+        """
+        if not cache.is_set():
+            return func(*args)
+
+        cache_key = f'billing:identity:{domain_id}:{self._get_caller_scope()}:{key}'
+        data = cache.get(cache_key)
+        if data is not None:
+            return data
+
+        data = func(*args)
+        cache.set(cache_key, data, expire=config.get_global('IDENTITY_CACHE_TTL', DEFAULT_IDENTITY_CACHE_TTL))
+        return data
+
+    def _get_caller_scope(self):
+        """ Hash of caller's authorization (user_type, role_type, projects, project_groups)
+        """
+        scope = {
+            'user_type': self.transaction.get_meta('authorization.user_type'),
+            'role_type': self.transaction.get_meta('authorization.role_type'),
+            'projects': sorted(self.transaction.get_meta('authorization.projects') or []),
+            'project_groups': sorted(self.transaction.get_meta('authorization.project_groups') or [])
+        }
+        return hashlib.md5(json.dumps(scope, sort_keys=True).encode('utf-8')).hexdigest()
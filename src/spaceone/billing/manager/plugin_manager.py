@@ -1,13 +1,57 @@
+import hashlib
+import json
 import logging
+import threading
+import time
 
-from spaceone.core.cache import cacheable
+from concurrent.futures import ThreadPoolExecutor
+
+from spaceone.core import cache
+from spaceone.core import config
 from spaceone.core.manager import BaseManager
 from spaceone.core.connector.space_connector import SpaceConnector
 from spaceone.billing.connector.billing_plugin_connector import BillingPluginConnector
 from spaceone.billing.model.data_source_model import DataSource
+from spaceone.billing.error import *
+from spaceone.billing.lib.circuit_breaker import get_circuit_breaker
+from spaceone.billing.lib.concurrency_limiter import get_concurrency_limiter, get_global_concurrency_limiter, \
+    DEFAULT_MAX_CONCURRENCY, SUCCESS, OVERLOADED, IGNORED
+from spaceone.billing.lib.plugin_data_cache import get_plugin_data_cache
+from spaceone.billing.lib.single_flight import SingleFlight, CacheLock
+from spaceone.billing.lib.time_segment import make_segments, group_contiguous_segments, split_response, \
+    merge_responses, get_segment_expire
 
 _LOGGER = logging.getLogger(__name__)
 
+# plugin version upgrade is done in background, not in request
+_UPGRADE_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix='plugin-upgrade')
+_UPGRADE_LOCK = threading.Lock()
+_UPGRADING_DATA_SOURCES = set()
+# data_source_id: (updated_version, failed_at), failed upgrade is retried after upgrade_retry_interval
+_UPGRADE_FAILURES = {}
+
+# identical concurrent plugin fetches are coalesced
+_SINGLE_FLIGHT = SingleFlight()
+
+# stale segments are refreshed in background
+_REFRESH_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix='plugin-data-refresh')
+_REFRESH_LOCK = threading.Lock()
+_REFRESHING_KEYS = set()
+
+DEFAULT_PLUGIN_TIMEOUT = 60
+DEFAULT_PLUGIN_ENDPOINT_CACHE_TTL = 300
+DEFAULT_UPGRADE_RETRY_INTERVAL = 600
+
+
+def _dict_hash(data):
+    """ hash dictionary
+    return hex digest
+    """
+    data_hash = hashlib.md5()
+    encoded = json.dumps(data, sort_keys=True).encode()
+    data_hash.update(encoded)
+    return data_hash.hexdigest()
+
 
 class PluginManager(BaseManager):
 
@@ -17,6 +61,8 @@ class PluginManager(BaseManager):
         self.billing_plugin_connector: BillingPluginConnector = self.locator.get_connector('BillingPluginConnector')
 
     def initialize(self, endpoint):
+        """ Set endpoint of plugin, client is connected on first call (inside circuit breaker of get_data)
+        """
         _LOGGER.debug(f'[initialize] data source plugin endpoint: {endpoint}')
         self.billing_plugin_connector.initialize(endpoint)
 
@@ -31,8 +77,8 @@ class PluginManager(BaseManager):
     def verify_plugin(self, options, secret_data, schema):
         self.billing_plugin_connector.verify(options, secret_data, schema)
 
-    @cacheable(key='billing:{cache_key}', expire=3600)
-    def get_data(self, schema, options, secret_data, filter, aggregation, start, end, granularity, cache_key):
+    def get_data(self, schema, options, secret_data, filter, aggregation, start, end, granularity, cache_key,
+                 timeout=None):
         """
         Args:
             schema: str
@@ -43,22 +89,299 @@ class PluginManager(BaseManager):
             start: str
             end: str
             granularity: str
-            cache_key: str for data caching
+            cache_key: str for data caching (without start, end)
+            timeout: float, seconds of plugin call (default: PLUGIN_GET_DATA.timeout)
+
+        Data is cached by time segment (calendar month),
+        only missing segments are requested to plugin, then segments are stitched.
+        Closed periods are cached longer than open period (see get_segment_expire).
+        Identical concurrent fetches share one plugin call (see _fetch_segments).
+        Expired segments within stale_window are returned with 'is_stale', and refreshed in background.
+        Plugin calls fail fast, while circuit breaker of endpoint is open.
         """
-        billing_data_info = self.billing_plugin_connector.get_data(schema, options, secret_data, filter, aggregation, start, end, granularity)
+        cache_conf = config.get_global('PLUGIN_DATA_CACHE', {})
+        plugin_data_cache = get_plugin_data_cache(cache_conf)
+        segments = make_segments(start, end, granularity)
+        timeout = self._get_timeout(timeout, config.get_global('PLUGIN_GET_DATA', {}))
+
+        segment_responses = {}
+        missing_segments = []
+        stale_segments = []
+        for segment in segments:
+            (billing_data_info, is_stale) = self._get_cached_segment(plugin_data_cache, cache_key, segment)
+            if billing_data_info is None:
+                missing_segments.append(segment)
+            else:
+                segment_responses[segment] = billing_data_info
+                if is_stale:
+                    stale_segments.append(segment)
+
+        if len(stale_segments) > 0:
+            self._refresh_segments_in_background(cache_key, stale_segments, schema, options, secret_data, filter,
+                                                 aggregation, granularity)
+
+        for segment_group in group_contiguous_segments(missing_segments):
+            fetch_key = self._make_segment_cache_key(cache_key, (segment_group[0][0], segment_group[-1][1]))
+            try:
+                segment_responses.update(_SINGLE_FLIGHT.do(fetch_key, self._fetch_segments, fetch_key, cache_key,
+                                                           segment_group, schema, options, secret_data, filter,
+                                                           aggregation, granularity, timeout, wait_timeout=timeout))
+            except TimeoutError:
+                # in-flight call of other request is not done within timeout of this request
+                raise ERROR_PLUGIN_TIMEOUT(endpoint=self.billing_plugin_connector.endpoint, timeout=timeout)
+
+        if len(segments) == 1:
+            billing_data_info = segment_responses[segments[0]]
+        else:
+            billing_data_info = merge_responses([segment_responses[segment] for segment in segments])
+
+        if len(stale_segments) > 0:
+            # cached response is shared, do not modify
+            billing_data_info = dict(billing_data_info, is_stale=True)
 
         return billing_data_info
 
+    def get_fresh_data(self, schema, options, secret_data, filter, aggregation, start, end, granularity,
+                       timeout=None):
+        """ Get data from plugin, without plugin data cache
+        For data which is kept as final (ex. BillingData store), cached data may be collected before closed
+        """
+        return self._get_plugin_data(schema, options, secret_data, filter, aggregation, start, end, granularity,
+                                     timeout)
+
+    def _fetch_segments(self, fetch_key, cache_key, segment_group, schema, options, secret_data, filter,
+                        aggregation, granularity, timeout=None):
+        """ Request contiguous segments to plugin and cache them
+        If PLUGIN_DATA_SINGLE_FLIGHT.distributed, other workers wait for cached result of lock holder
+
+        Returns:
+            {(start, end): response}
+        """
+        cache_conf = config.get_global('PLUGIN_DATA_CACHE', {})
+        plugin_data_cache = get_plugin_data_cache(cache_conf)
+        single_flight_conf = config.get_global('PLUGIN_DATA_SINGLE_FLIGHT', {})
+
+        timeout = self._get_timeout(timeout, config.get_global('PLUGIN_GET_DATA', {}))
+        deadline = time.time() + timeout
+
+        lock = None
+        if single_flight_conf.get('distributed', False):
+            lock = CacheLock(fetch_key, **single_flight_conf.get('lock', {}))
+            if not lock.acquire():
+                segment_responses = {}
+
+                def _is_cached():
+                    for segment in segment_group:
+                        if segment not in segment_responses:
+                            (segment_response, is_stale) = self._get_cached_segment(plugin_data_cache, cache_key,
+                                                                                    segment)
+                            if segment_response is None or is_stale:
+                                return False
+                            segment_responses[segment] = segment_response
+                    return True
+
+                if lock.wait(_is_cached, timeout):
+                    return segment_responses
+
+                if deadline <= time.time():
+                    raise ERROR_PLUGIN_TIMEOUT(endpoint=self.billing_plugin_connector.endpoint, timeout=timeout)
+
+                _LOGGER.debug(f'[_fetch_segments] lock holder did not cache result, request by itself: {fetch_key}')
+
+        try:
+            group_start = segment_group[0][0]
+            group_end = segment_group[-1][1]
+            _LOGGER.debug(f'[_fetch_segments] request missing segments to plugin: {group_start} ~ {group_end}')
+
+            # time waited for lock holder is a part of timeout
+            billing_data_info = self._get_plugin_data(schema, options, secret_data, filter, aggregation,
+                                                      group_start, group_end, granularity, deadline - time.time())
+            segment_responses = split_response(billing_data_info, segment_group)
+            for segment, segment_response in segment_responses.items():
+                self._set_cached_segment(plugin_data_cache, cache_conf, cache_key, segment, segment_response)
+
+            return segment_responses
+        finally:
+            if lock:
+                lock.release()
+
+    def _get_plugin_data(self, schema, options, secret_data, filter, aggregation, start, end, granularity,
+                         timeout=None):
+        """ Call plugin with timeout, through circuit breaker and concurrency limiters of endpoint
+        Timeouts and connection errors are failures of endpoint (and decrease its concurrency limit),
+        other errors (ex. invalid secret) are failures of request only.
+        Client of endpoint is connected by the first call, so unreachable endpoint also opens circuit breaker.
+        """
+        plugin_conf = config.get_global('PLUGIN_GET_DATA', {})
+        timeout = self._get_timeout(timeout, plugin_conf)
+        endpoint = self.billing_plugin_connector.endpoint
+        circuit_breaker = get_circuit_breaker(endpoint, plugin_conf.get('circuit_breaker', {}))
+
+        if circuit_breaker.is_open():
+            raise ERROR_PLUGIN_CIRCUIT_OPEN(endpoint=endpoint)
+
+        limiter_conf = plugin_conf.get('concurrency_limiter', {})
+        endpoint_limiter = get_concurrency_limiter(endpoint, limiter_conf.get('endpoint', {}))
+        global_limiter = get_global_concurrency_limiter(limiter_conf.get('max_concurrency',
+                                                                         DEFAULT_MAX_CONCURRENCY))
+
+        # waiting for slots is a part of timeout
+        deadline = time.time() + timeout
+        if not endpoint_limiter.acquire(timeout):
+            raise ERROR_PLUGIN_THROTTLED(endpoint=endpoint)
+
+        # only timeouts and connection errors are overload, throttled or other errors do not change limit
+        outcome = IGNORED
+        try:
+            if not global_limiter.acquire(deadline - time.time()):
+                raise ERROR_PLUGIN_THROTTLED(endpoint=endpoint)
+
+            try:
+                # slots are acquired before, so half open trial is always completed by record_success/failure
+                if not circuit_breaker.allow_request():
+                    raise ERROR_PLUGIN_CIRCUIT_OPEN(endpoint=endpoint)
+
+                try:
+                    billing_data_info = self.billing_plugin_connector.get_data(schema, options, secret_data, filter,
+                                                                               aggregation, start, end, granularity,
+                                                                               timeout=deadline - time.time())
+                except (ERROR_PLUGIN_TIMEOUT, ERROR_GRPC_CONNECTION) as e:
+                    outcome = OVERLOADED
+                    circuit_breaker.record_failure()
+                    raise e
+                except Exception as e:
+                    circuit_breaker.record_success()
+                    raise e
+
+                outcome = SUCCESS
+                circuit_breaker.record_success()
+                return billing_data_info
+            finally:
+                global_limiter.release()
+
+        finally:
+            endpoint_limiter.release(outcome)
+
+    @staticmethod
+    def _get_timeout(timeout, plugin_conf):
+        """ Timeout of plugin call, PLUGIN_GET_DATA.timeout if not given
+        No time left (0 or less) is an error, not a default
+        """
+        if timeout is None:
+            return plugin_conf.get('timeout', DEFAULT_PLUGIN_TIMEOUT)
+
+        if timeout <= 0:
+            raise ERROR_REQUEST_DEADLINE_EXCEEDED()
+
+        return timeout
+
+    def _refresh_segments_in_background(self, cache_key, stale_segments, schema, options, secret_data, filter,
+                                        aggregation, granularity):
+        for segment_group in group_contiguous_segments(stale_segments):
+            fetch_key = self._make_segment_cache_key(cache_key, (segment_group[0][0], segment_group[-1][1]))
+            with _REFRESH_LOCK:
+                if fetch_key in _REFRESHING_KEYS:
+                    continue
+                _REFRESHING_KEYS.add(fetch_key)
+
+            _REFRESH_EXECUTOR.submit(self._refresh_segments, fetch_key, cache_key, segment_group, schema, options,
+                                     secret_data, filter, aggregation, granularity)
+
+    def _refresh_segments(self, fetch_key, *args):
+        try:
+            _SINGLE_FLIGHT.do(fetch_key, self._fetch_segments, fetch_key, *args)
+        except Exception as e:
+            _LOGGER.error(f'[_refresh_segments] fail to refresh stale data: {fetch_key}, {e}')
+        finally:
+            with _REFRESH_LOCK:
+                _REFRESHING_KEYS.discard(fetch_key)
+
+    def _get_cached_segment(self, plugin_data_cache, cache_key, segment):
+        """
+        Returns:
+            (response, is_stale), (None, False) if not cached
+        """
+        cached_segment = plugin_data_cache.get(self._make_segment_cache_key(cache_key, segment))
+        if cached_segment is None:
+            return None, False
+
+        if 'response' not in cached_segment:
+            # cached by previous version, without fresh_until
+            return cached_segment, False
+
+        fresh_until = cached_segment.get('fresh_until')
+        return cached_segment['response'], fresh_until is not None and fresh_until < time.time()
+
+    def _set_cached_segment(self, plugin_data_cache, cache_conf, cache_key, segment, response):
+        """ Segment is kept stale_window more after expired, for stale-while-revalidate
+        """
+        expire = get_segment_expire(segment, cache_conf)
+        if expire:
+            cached_segment = {'response': response, 'fresh_until': time.time() + expire}
+            expire += cache_conf.get('stale_window', 0)
+        else:
+            cached_segment = {'response': response, 'fresh_until': None}
+
+        plugin_data_cache.set(self._make_segment_cache_key(cache_key, segment), cached_segment, expire=expire)
+
+    @staticmethod
+    def make_data_cache_key(params, domain_id):
+        """ from params, create cache key of get_data
+            schema: str
+            options: dict
+            secret_data: dict
+            filter: dict
+            aggregation: list
+            granularity: str
+        """
+        return f'billing:{domain_id}:{_dict_hash(params)}'
+
+    @staticmethod
+    def _make_segment_cache_key(cache_key, segment):
+        return f'billing:{cache_key}:{segment[0]}:{segment[1]}'
+
     def get_billing_plugin_endpoint_by_vo(self, data_source_vo: DataSource):
         plugin_info = data_source_vo.plugin_info.to_dict()
-        endpoint, updated_version = self.get_billing_plugin_endpoint(plugin_info, data_source_vo.domain_id)
+        endpoint_info = self.get_cached_billing_plugin_endpoint(plugin_info['plugin_id'],
+                                                                plugin_info.get('version'),
+                                                                plugin_info.get('upgrade_mode', 'AUTO'),
+                                                                data_source_vo.domain_id)
+        endpoint = endpoint_info['endpoint']
+        updated_version = endpoint_info.get('updated_version')
 
         if updated_version:
             _LOGGER.debug(f'[get_billing_plugin_endpoint_by_vo] upgrade plugin version: {plugin_info["version"]} -> {updated_version}')
-            self.upgrade_billing_plugin_version(data_source_vo, endpoint, updated_version)
+            self._upgrade_billing_plugin_version_in_background(data_source_vo, endpoint, updated_version)
 
         return endpoint
 
+    def get_cached_billing_plugin_endpoint(self, plugin_id, version, upgrade_mode, domain_id):
+        """ Plugin endpoint, cached for PLUGIN_ENDPOINT_CACHE.ttl seconds
+        """
+        cache_key = self._make_plugin_endpoint_cache_key(plugin_id, version, upgrade_mode, domain_id)
+        if cache.is_set():
+            endpoint_info = cache.get(cache_key)
+            if endpoint_info is not None:
+                return endpoint_info
+
+        plugin_info = {'plugin_id': plugin_id, 'version': version, 'upgrade_mode': upgrade_mode}
+        endpoint, updated_version = self.get_billing_plugin_endpoint(plugin_info, domain_id)
+        endpoint_info = {'endpoint': endpoint, 'updated_version': updated_version}
+
+        if cache.is_set():
+            cache_conf = config.get_global('PLUGIN_ENDPOINT_CACHE', {})
+            cache.set(cache_key, endpoint_info, expire=cache_conf.get('ttl', DEFAULT_PLUGIN_ENDPOINT_CACHE_TTL))
+
+        return endpoint_info
+
+    def delete_cached_billing_plugin_endpoint(self, plugin_id, version, upgrade_mode, domain_id):
+        if cache.is_set():
+            cache.delete(self._make_plugin_endpoint_cache_key(plugin_id, version, upgrade_mode, domain_id))
+
+    @staticmethod
+    def _make_plugin_endpoint_cache_key(plugin_id, version, upgrade_mode, domain_id):
+        return f'billing:plugin-endpoint:{domain_id}:{plugin_id}:{version}:{upgrade_mode}'
+
     def get_billing_plugin_endpoint(self, plugin_info, domain_id):
         plugin_id = plugin_info['plugin_id']
         version = plugin_info.get('version')
@@ -79,3 +402,40 @@ class PluginManager(BaseManager):
         plugin_info['version'] = updated_version
         plugin_info['metadata'] = plugin_metadata
         data_source_vo.update({'plugin_info': plugin_info})
+
+    def _upgrade_billing_plugin_version_in_background(self, data_source_vo: DataSource, endpoint, updated_version):
+        data_source_id = data_source_vo.data_source_id
+        cache_conf = config.get_global('PLUGIN_ENDPOINT_CACHE', {})
+        retry_interval = cache_conf.get('upgrade_retry_interval', DEFAULT_UPGRADE_RETRY_INTERVAL)
+        with _UPGRADE_LOCK:
+            if data_source_id in _UPGRADING_DATA_SOURCES:
+                return
+
+            # same upgrade is failed recently, back off
+            failure = _UPGRADE_FAILURES.get(data_source_id)
+            if failure and failure[0] == updated_version and failure[1] + retry_interval > time.time():
+                return
+
+            _UPGRADING_DATA_SOURCES.add(data_source_id)
+
+        _UPGRADE_EXECUTOR.submit(self._upgrade_billing_plugin_version, data_source_vo, endpoint, updated_version)
+
+    def _upgrade_billing_plugin_version(self, data_source_vo: DataSource, endpoint, updated_version):
+        plugin_info = data_source_vo.plugin_info.to_dict()
+        try:
+            # connector of this manager is used by request, upgrade with new one
+            plugin_mgr: PluginManager = self.locator.get_manager('PluginManager')
+            plugin_mgr.upgrade_billing_plugin_version(data_source_vo, endpoint, updated_version)
+            self.delete_cached_billing_plugin_endpoint(plugin_info['plugin_id'], plugin_info.get('version'),
+                                                       plugin_info.get('upgrade_mode', 'AUTO'),
+                                                       data_source_vo.domain_id)
+            with _UPGRADE_LOCK:
+                _UPGRADE_FAILURES.pop(data_source_vo.data_source_id, None)
+        except Exception as e:
+            _LOGGER.error(f'[_upgrade_billing_plugin_version] fail to upgrade plugin version: '
+                          f'{data_source_vo.data_source_id} -> {updated_version}, {e}')
+            with _UPGRADE_LOCK:
+                _UPGRADE_FAILURES[data_source_vo.data_source_id] = (updated_version, time.time())
+        finally:
+            with _UPGRADE_LOCK:
+                _UPGRADING_DATA_SOURCES.discard(data_source_vo.data_source_id)
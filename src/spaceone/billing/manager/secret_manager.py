@@ -1,8 +1,10 @@
 import logging
 
+from spaceone.core import config
 from spaceone.core.manager import BaseManager
 from spaceone.core.connector.space_connector import SpaceConnector
 from spaceone.billing.error import *
+from spaceone.billing.lib.secret_cache import get_secret_data_cache
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -16,15 +18,31 @@ class SecretManager(BaseManager):
     def list_secrets(self, query, domain_id):
         return self.secret_connector.dispatch('Secret.list', {'query': query, 'domain_id': domain_id})
 
-    def list_secrets_by_service_account_id(self, service_account_id, domain_id):
-        return self.secret_connector.dispatch('Secret.list', {
-            'service_account_id': service_account_id,
-            'domain_id': domain_id})
+    def list_secrets_by_service_account_ids(self, service_account_ids, supported_schema, domain_id):
+        secret_query = self._make_query(service_accounts=service_account_ids, supported_schema=supported_schema)
+        return self.list_secrets(secret_query, domain_id)
 
     def get_secret_data(self, secret_id, domain_id):
         response = self.secret_connector.dispatch('Secret.get_data', {'secret_id': secret_id, 'domain_id': domain_id})
         return response['data']
 
+    def get_cached_secret_data(self, secret_id, domain_id):
+        """ Secret data for get_data fan-out, cached if SECRET_DATA_CACHE.enabled
+        Register and verify of data source use get_secret_data, so rotated secrets are always read there
+        """
+        cache_conf = config.get_global('SECRET_DATA_CACHE', {})
+        if not cache_conf.get('enabled', False):
+            return self.get_secret_data(secret_id, domain_id)
+
+        # process-local only, secret data is never stored in shared cache
+        secret_data_cache = get_secret_data_cache(cache_conf)
+        secret_data = secret_data_cache.get(domain_id, secret_id)
+        if secret_data is None:
+            secret_data = self.get_secret_data(secret_id, domain_id)
+            secret_data_cache.set(domain_id, secret_id, secret_data)
+
+        return secret_data
+
     def get_plugin_secret_data(self, secret_id, supported_schema, domain_id):
         secret_query = self._make_query(supported_schema=supported_schema, secret_id=secret_id)
         response = self.list_secrets(secret_query, domain_id)
@@ -90,6 +108,7 @@ class SecretManager(BaseManager):
         project_id = secret_filter.get('project_id')
         provider = secret_filter.get('provider')
         secrets = secret_filter.get('secrets')
+        service_accounts = secret_filter.get('service_accounts')
 
         query = {
             'filter': []
@@ -137,4 +156,11 @@ class SecretManager(BaseManager):
                 'o': 'in'
             })
 
+        if service_accounts:
+            query['filter'].append({
+                'k': 'service_account_id',
+                'v': service_accounts,
+                'o': 'in'
+            })
+
         return query
@@ -1 +1,2 @@
 from spaceone.billing.model.data_source_model import DataSource
+from spaceone.billing.model.billing_data_model import BillingData, BillingDataPeriod
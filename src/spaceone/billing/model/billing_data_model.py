@@ -0,0 +1,77 @@
+from mongoengine import *
+
+from spaceone.core.model.mongo_model import MongoModel
+
+
+class BillingData(MongoModel):
+    cost = FloatField(default=0)
+    currency = StringField(max_length=40, default='USD')
+    date = StringField(max_length=10)
+    month = StringField(max_length=7)
+    granularity = StringField(max_length=20, choices=('DAILY', 'MONTHLY'))
+    resource_type = StringField(max_length=255)
+    provider = StringField(max_length=40, default=None, null=True)
+    region_code = StringField(max_length=255, default=None, null=True)
+    service_code = StringField(max_length=255, default=None, null=True)
+    project_id = StringField(max_length=40)
+    service_account_id = StringField(max_length=40)
+    secret_id = StringField(max_length=40)
+    data_source_id = StringField(max_length=40)
+    domain_id = StringField(max_length=40)
+    created_at = DateTimeField(auto_now_add=True)
+
+    meta = {
+        'updatable_fields': [],
+        'minimal_fields': [
+            'cost',
+            'date',
+            'provider',
+            'region_code',
+            'service_code',
+            'project_id',
+            'service_account_id'
+        ],
+        'ordering': [
+            'date'
+        ],
+        'indexes': [
+            # replace billing data of collected month, delete by data source
+            ('domain_id', 'data_source_id', 'secret_id', 'granularity', 'month'),
+            # get_data groupings
+            ('domain_id', 'granularity', 'data_source_id', 'secret_id', 'date'),
+            ('domain_id', 'granularity', 'project_id', 'date'),
+            ('domain_id', 'granularity', 'service_account_id', 'date'),
+            ('domain_id', 'granularity', 'provider', 'region_code', 'date'),
+            ('domain_id', 'granularity', 'service_code', 'date')
+        ]
+    }
+
+
+class BillingDataPeriod(MongoModel):
+    month = StringField(max_length=7)
+    granularity = StringField(max_length=20, choices=('DAILY', 'MONTHLY'))
+    is_closed = BooleanField(default=False)
+    service_account_id = StringField(max_length=40)
+    secret_id = StringField(max_length=40)
+    data_source_id = StringField(max_length=40)
+    domain_id = StringField(max_length=40)
+    collected_at = DateTimeField(auto_now=True)
+
+    meta = {
+        'updatable_fields': [
+            'is_closed',
+            'collected_at'
+        ],
+        'minimal_fields': [
+            'month',
+            'granularity',
+            'is_closed',
+            'secret_id'
+        ],
+        'ordering': [
+            'month'
+        ],
+        'indexes': [
+            ('domain_id', 'data_source_id', 'secret_id', 'granularity', 'month')
+        ]
+    }
@@ -1,2 +1,3 @@
 from spaceone.billing.service.data_source_service import DataSourceService
 from spaceone.billing.service.billing_service import BillingService
+from spaceone.billing.service.collector_service import CollectorService
@@ -1,7 +1,8 @@
 import logging
-import hashlib
-import json
 import re
+import time
+
+from concurrent.futures import ThreadPoolExecutor
 
 import pandas as pd
 
@@ -9,12 +10,16 @@ from dateutil.parser import parse
 from dateutil.relativedelta import relativedelta
 
 from spaceone.core.service import *
+from spaceone.core import config
 
 from spaceone.billing.error import *
 from spaceone.billing.manager.identity_manager import IdentityManager
 from spaceone.billing.manager.secret_manager import SecretManager
 from spaceone.billing.manager.data_source_manager import DataSourceManager
 from spaceone.billing.manager.plugin_manager import PluginManager
+from spaceone.billing.manager.billing_data_manager import BillingDataManager
+from spaceone.billing.lib.billing_data import BillingDataBuilder
+from spaceone.billing.lib.time_segment import make_segments
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -27,17 +32,18 @@ AGGR_MAP = {
     'inventory.CloudServiceType': 'service_code'
 }
 
-DEFAULT_CURRENCY = 'USD'
-
+# filter of get_data, {key: [value, ...]}, other keys are ignored
+# provider: data sources are pruned, project_id, service_account_id: secrets are pruned
+# region_code, service_code: pushed down to plugins which support it (metadata.supported_filter),
+#   or masked in response of other plugins, and queried from BillingData store
+FILTER_KEYS = ['provider', 'project_id', 'service_account_id', 'region_code', 'service_code']
+MASK_FILTER_KEYS = ['region_code', 'service_code']
+FILTER_DIMENSIONS = {value: key for (key, value) in AGGR_MAP.items()}
 
-def _dict_hash(data):
-    """ hash dictionary
-    return hex digest
-    """
-    data_hash = hashlib.md5()
-    encoded = json.dumps(data, sort_keys=True).encode()
-    data_hash.update(encoded)
-    return data_hash.hexdigest()
+DEFAULT_CURRENCY = 'USD'
+DEFAULT_MAX_WORKERS = 16
+DEFAULT_PLUGIN_TIMEOUT = 60
+DEFAULT_DEADLINE_MARGIN = 1
 
 
 @authentication_handler
@@ -52,6 +58,10 @@ class BillingService(BaseService):
         self.secret_mgr: SecretManager = self.locator.get_manager('SecretManager')
         self.data_source_mgr: DataSourceManager = self.locator.get_manager('DataSourceManager')
         self.plugin_mgr: PluginManager = self.locator.get_manager('PluginManager')
+        # endpoint: supported_filter of plugin metadata
+        self.supported_filters = {}
+        # endpoint: data_source_id
+        self.data_source_ids = {}
 
     @transaction(append_meta={
         'authorization.scope': 'PROJECT',
@@ -79,135 +89,352 @@ class BillingService(BaseService):
 
         Examples:
             sort = {'date': '2020-12', 'desc': True}
+            filter = {'region_code': ['ap-northeast-2', 'us-east-1'], 'project_id': 'project-1234'}
         Returns:
-            billing_data_info (list)
+            billing_data_info (list), with 'is_stale': True if any data is served stale from cache
+                and 'skipped_sources': [{'service_account_id': 'str', 'error_code': 'str'}] if any plugin is failed
         """
         params = self._check_params(params)
-
         domain_id = params['domain_id']
-        # Get possible service_account list from DataSources
-        project_id = params.get('project_id', None)
-        project_group_id = params.get('project_group_id', None)
-        service_accounts = params.get('service_accounts', [])
         aggregation = params.get('aggregation', [])
         sort = params.get('sort', {'desc': True})
         limit = params.get('limit', None)
         self.currency = params.get('currency', DEFAULT_CURRENCY)
 
-        # Initialize plugin_mgr
-        # caching endpoints
-        # data_source : {'label': 'endpoint'}
-        self.merged_data = None
-        endpoint_dic = {}
-        possible_service_accounts = self._get_possible_service_accounts(domain_id, project_id, project_group_id, service_accounts)
-
-        if possible_service_accounts == {}:
+        (plugin_tasks, stored_secrets) = self._get_plugin_tasks(params)
+        if len(plugin_tasks) == 0 and len(stored_secrets) == 0:
             # nothing to do
             return {'results': [], 'total_count': 0}
 
-        _LOGGER.debug(f'[get_data] {possible_service_accounts}')
-        data_arrays_list = []
-        for (endpoint, (service_account_ids, supported_schema)) in possible_service_accounts.items():
-            # get secret from service account
-            for service_account_id in service_account_ids:
-                secrets_info = self.secret_mgr.list_secrets_by_service_account_id(service_account_id, domain_id)
-                for secret in secrets_info['results']:
-                    if secret['schema'] not in supported_schema:
-                        _LOGGER.debug(f'[skip] not supported schema: {secret["schema"]} in {supported_schema}')
-                        continue
-                    try:
-                        secret_id = secret['secret_id']
-                        secret_data = self.secret_mgr.get_secret_data(secret_id, domain_id)
-                        # call plugin_manager for get data
-                        # get data
-                        param_for_plugin = {
-                            'schema': secret['schema'],
-                            'options': {},
-                            'secret_data': secret_data,
-                            'filter': {},
-                            'aggregation': self._get_plugin_aggregation(aggregation),
-                            'start': params['start'],
-                            'end': params['end'],
-                            'granularity': params['granularity'],
-                        }
-                        param_for_plugin['cache_key'] = self._make_cache_key(param_for_plugin, domain_id)
-                        self.plugin_mgr.initialize(endpoint)
-                        response = self.plugin_mgr.get_data(**param_for_plugin)
-                        data_arrays = self._make_data_arrays(response, service_account_id, secret['project_id'])
-                        data_arrays_list.extend(data_arrays)
-                    except Exception as e:
-                        _LOGGER.error(f'[get_data] fail to get_data by {secret["secret_id"]}, skip.....')
-
-        _LOGGER.debug(f'[get_data] {data_arrays_list}')
-        # Make DataFrame from data_arrays_list
-        data_frames = pd.DataFrame(data_arrays_list)
-        data_frames.fillna(0, inplace=True)
+        billing_data = BillingDataBuilder()
+        billing_data.extend(self._get_stored_data(stored_secrets, params, domain_id))
+
+        if len(plugin_tasks) > 0:
+            with ThreadPoolExecutor(max_workers=self._get_max_workers(len(plugin_tasks))) as executor:
+                futures = self._submit_plugin_tasks(executor, plugin_tasks, params, domain_id)
+
+            for future in futures:
+                billing_data.extend(future.result())
+
+        _LOGGER.debug(f'[get_data] rows: {len(billing_data)}, dates: {billing_data.dates}')
+        return self._make_result(billing_data, aggregation, sort, limit, params)
+
+    def _get_plugin_tasks(self, params):
+        """ Find plugin calls for request
+        secrets whose all months are in BillingData store are not called
+
+        Returns:
+            ([(endpoint, secret_info, secret_data), ...], [(data_source_id, secret_info), ...])
+        """
+        domain_id = params['domain_id']
+        # Get possible service_account list from DataSources
+        project_id = params.get('project_id', None)
+        project_group_id = params.get('project_group_id', None)
+        service_accounts = params.get('service_accounts', [])
+        filter = params.get('filter', {})
+
+        possible_service_accounts = self._get_possible_service_accounts(domain_id, project_id, project_group_id,
+                                                                        service_accounts, filter.get('provider'))
+        if possible_service_accounts == {}:
+            return [], []
+
+        _LOGGER.debug(f'[_get_plugin_tasks] {possible_service_accounts}')
+        for (endpoint, (service_account_ids, supported_schema, supported_filter, data_source_id)) \
+                in possible_service_accounts.items():
+            self.supported_filters[endpoint] = supported_filter
+            self.data_source_ids[endpoint] = data_source_id
+
+        plugin_tasks = self._make_plugin_tasks(possible_service_accounts, domain_id)
+        plugin_tasks = self._filter_plugin_tasks(plugin_tasks, filter)
+        (plugin_tasks, stored_secrets) = self._split_stored_tasks(plugin_tasks, params)
+        if len(plugin_tasks) == 0:
+            return [], stored_secrets
+
+        secret_ids = list(dict.fromkeys([secret['secret_id'] for (endpoint, secret) in plugin_tasks]))
+        secret_data_map = self._get_secret_data_map(secret_ids, domain_id)
+
+        return [(endpoint, secret, secret_data_map[secret['secret_id']])
+                for (endpoint, secret) in plugin_tasks if secret['secret_id'] in secret_data_map], stored_secrets
+
+    def _split_stored_tasks(self, plugin_tasks, params):
+        """ Split plugin tasks, whose all months are already collected in BillingData store
+
+        Returns:
+            ([(endpoint, secret_info), ...], [(data_source_id, secret_info), ...])
+        """
+        if not config.get_global('BILLING_DATA_STORE_ENABLED', False) or len(plugin_tasks) == 0:
+            return plugin_tasks, []
+
+        months = self._get_stored_months(params['start'], params['end'], params['granularity'])
+        if months is None:
+            return plugin_tasks, []
 
         try:
-            result = self._get_aggregated_data(data_frames, aggregation, sort, limit)
+            billing_data_mgr: BillingDataManager = self.locator.get_manager('BillingDataManager')
+            data_source_ids = list(set([self.data_source_ids[endpoint] for (endpoint, secret) in plugin_tasks]))
+            secret_ids = list(set([secret['secret_id'] for (endpoint, secret) in plugin_tasks]))
+            collected_secrets = billing_data_mgr.list_collected_secrets(data_source_ids, secret_ids,
+                                                                        params['granularity'], months,
+                                                                        params['domain_id'])
         except Exception as e:
-            # Nothing to aggregation
-            return {'results': [], 'total_count': 0}
-        # make to output format
+            _LOGGER.error(f'[_split_stored_tasks] fail to find collected secrets, use plugins..... {e}')
+            return plugin_tasks, []
+
+        stored_secrets = [(self.data_source_ids[endpoint], secret) for (endpoint, secret) in plugin_tasks
+                          if (self.data_source_ids[endpoint], secret['secret_id']) in collected_secrets]
+        plugin_tasks = [(endpoint, secret) for (endpoint, secret) in plugin_tasks
+                        if (self.data_source_ids[endpoint], secret['secret_id']) not in collected_secrets]
+        return plugin_tasks, stored_secrets
+
+    @staticmethod
+    def _get_stored_months(start, end, granularity):
+        """ Months of request, which can be served by BillingData store
+        MONTHLY data is stored by whole month, so partial month is not served
+
+        Returns:
+            ['yyyy-mm', ...] or None
+        """
+        if granularity not in ['MONTHLY', 'DAILY']:
+            return None
+
+        segments = make_segments(start, end, granularity)
+        if granularity == 'MONTHLY':
+            (first_start, first_end) = segments[0]
+            (last_start, last_end) = segments[-1]
+            if not first_start.endswith('-01') or parse(last_end) != parse(last_start) + relativedelta(day=31):
+                return None
+
+        return [segment_start[:7] for (segment_start, segment_end) in segments]
+
+    def _get_stored_data(self, stored_secrets, params, domain_id):
+        """ Get data of collected secrets by single aggregation of BillingData store per data source
+        """
+        dimensions = params.get('aggregation', [])
+        billing_data = BillingDataBuilder(dimensions=['resource_type'] + dimensions)
+        if len(stored_secrets) == 0:
+            return billing_data
+
+        secret_ids_by_data_source = {}
+        for (data_source_id, secret) in stored_secrets:
+            secret_ids_by_data_source.setdefault(data_source_id, []).append(secret['secret_id'])
+
+        filter = params.get('filter', {})
         try:
-            result = self._create_result(result, domain_id)
-            return result
+            billing_data_mgr: BillingDataManager = self.locator.get_manager('BillingDataManager')
+            results = []
+            for (data_source_id, secret_ids) in secret_ids_by_data_source.items():
+                results.extend(billing_data_mgr.analyze_billing_data(data_source_id, secret_ids,
+                                                                     [AGGR_MAP[key] for key in dimensions],
+                                                                     params['granularity'], params['start'],
+                                                                     params['end'], domain_id,
+                                                                     filter={key: filter[key]
+                                                                             for key in MASK_FILTER_KEYS
+                                                                             if key in filter}))
         except Exception as e:
-            raise ERROR_BILLING_CREATE_RESULT(params=params)
+            _LOGGER.error(f'[_get_stored_data] fail to get data from BillingData store, skip..... {e}')
+            return billing_data
 
-    def _make_data_arrays(self, result, service_account_id, project_id):
-        results = result.get('results', [])
-        data_arrays = []
         for result in results:
-            resource_type = result['resource_type'] + \
-                f'&identity.Project={project_id}&identity.ServiceAccount={service_account_id}'
-            fields = self._parse_resource_type(resource_type)
-            billing_data = result['billing_data']
-            single_data = fields.copy()
-            for billing_info in billing_data:
-                date = billing_info['date']
-                cost = billing_info.get('cost', 0)
-                currency = billing_info.get('currency', 'USD')
-                single_data[date] = cost
-            data_arrays.append(single_data)
-        return data_arrays
+            row_dimensions = {'resource_type': result['resource_type']}
+            for key in dimensions:
+                if result.get(AGGR_MAP[key]) is not None:
+                    row_dimensions[key] = str(result[AGGR_MAP[key]])
+            billing_data.add_row(row_dimensions, [{'date': result['date'], 'cost': result['cost']}])
+
+        return billing_data
+
+    def _submit_plugin_tasks(self, executor, plugin_tasks, params, domain_id):
+        return [executor.submit(self._get_plugin_data, endpoint, secret, secret_data, params, domain_id)
+                for (endpoint, secret, secret_data) in plugin_tasks]
+
+    def _make_result(self, billing_data, aggregation, sort, limit, params):
+        """ Aggregate billing data and make to output format
+        'is_stale' is added, if any data is served stale from cache
+        'skipped_sources' is added, if any plugin call is failed (timeout, circuit open, ...)
+        """
+        data_frames = billing_data.to_dataframe()
+
+        try:
+            result = self._get_aggregated_data(data_frames, aggregation, sort, limit)
+        except Exception as e:
+            # Nothing to aggregation
+            result = None
+
+        if result is None:
+            billing_data_info = {'results': [], 'total_count': 0}
+        else:
+            # make to output format
+            try:
+                billing_data_info = self._create_result(result, params['domain_id'])
+            except Exception as e:
+                raise ERROR_BILLING_CREATE_RESULT(params=params)
+
+        if billing_data.is_stale:
+            billing_data_info['is_stale'] = True
+
+        if len(billing_data.skipped_sources) > 0:
+            billing_data_info['skipped_sources'] = billing_data.skipped_sources
+
+        return billing_data_info
 
     @staticmethod
-    def _parse_resource_type(res_type):
-        """ Return dict
-        example
-        {
-            'resource_type': 'inventory.CloudService',
-            'provider': 'aws',
-            'region_code': 'ap-northeast-2'
-            ...
-        }
+    def _get_max_workers(task_count):
+        return max(1, min(config.get_global('GET_DATA_MAX_WORKERS', DEFAULT_MAX_WORKERS), task_count))
+
+    def _make_plugin_tasks(self, possible_service_accounts, domain_id):
+        """ Resolve secrets of all possible service accounts by single Secret.list
+
+        Returns:
+            [(endpoint, secret_info), ...]
         """
-        item = res_type.split('?')
-        result = {'resource_type': item[0]}
-        if len(item) > 1:
-            query = item[1].split('&')
-        else:
-            query = []
-        for q_item in query:
-            (a,b) = q_item.split('=')
-            result[a] = b
-        return result
+        all_service_account_ids = []
+        all_supported_schema = []
+        for (service_account_ids, supported_schema, supported_filter, data_source_id) \
+                in possible_service_accounts.values():
+            all_service_account_ids.extend(service_account_ids)
+            all_supported_schema.extend(supported_schema)
+
+        if len(all_service_account_ids) == 0:
+            return []
+
+        secrets_info = self.secret_mgr.list_secrets_by_service_account_ids(list(set(all_service_account_ids)),
+                                                                           list(set(all_supported_schema)),
+                                                                           domain_id)
+        secrets_by_service_account = {}
+        for secret in secrets_info.get('results', []):
+            secrets_by_service_account.setdefault(secret.get('service_account_id'), []).append(secret)
+
+        plugin_tasks = []
+        for (endpoint, (service_account_ids, supported_schema, supported_filter, data_source_id)) \
+                in possible_service_accounts.items():
+            for service_account_id in service_account_ids:
+                for secret in secrets_by_service_account.get(service_account_id, []):
+                    if secret['schema'] not in supported_schema:
+                        _LOGGER.debug(f'[skip] not supported schema: {secret["schema"]} in {supported_schema}')
+                        continue
+                    plugin_tasks.append((endpoint, secret))
+        return plugin_tasks
+
+    @staticmethod
+    def _filter_plugin_tasks(plugin_tasks, filter):
+        """ Prune secrets by project_id, service_account_id of filter
+        """
+        for key in ['project_id', 'service_account_id']:
+            if key in filter:
+                plugin_tasks = [(endpoint, secret) for (endpoint, secret) in plugin_tasks
+                                if secret.get(key) in filter[key]]
+        return plugin_tasks
+
+    def _get_secret_data_map(self, secret_ids, domain_id):
+        """ Get secret data in parallel, each secret is fetched only once
+
+        Returns:
+            {secret_id: secret_data}
+        """
+        def _get_secret_data(secret_id):
+            try:
+                return secret_id, self.secret_mgr.get_cached_secret_data(secret_id, domain_id)
+            except Exception as e:
+                _LOGGER.error(f'[_get_secret_data_map] fail to get secret data: {secret_id}, skip..... {e}')
+                return secret_id, None
+
+        with ThreadPoolExecutor(max_workers=self._get_max_workers(len(secret_ids))) as executor:
+            results = list(executor.map(_get_secret_data, secret_ids))
+
+        return {secret_id: secret_data for (secret_id, secret_data) in results if secret_data is not None}
+
+    def _get_plugin_data(self, endpoint, secret, secret_data, params, domain_id):
+        """ Get data from single plugin call (endpoint, service_account, secret)
+        Failure is isolated, returns empty BillingDataBuilder with skipped source
+        """
+        filter = params.get('filter', {})
+        aggregation = params.get('aggregation', [])
+        plugin_filter = self._get_plugin_filter(filter, self.supported_filters.get(endpoint, []))
+        # filter which is not pushed down is masked in response, plugin is called with its dimensions
+        mask = {FILTER_DIMENSIONS[key]: filter[key] for key in MASK_FILTER_KEYS
+                if key in filter and key not in plugin_filter}
+
+        # map-side combine, keep only dimensions of aggregation
+        billing_data = BillingDataBuilder(dimensions=['resource_type'] + aggregation, mask=mask)
+        try:
+            timeout = self._get_plugin_timeout()
+            if timeout <= 0:
+                raise ERROR_REQUEST_DEADLINE_EXCEEDED()
+
+            # call plugin_manager for get data
+            # get data
+            param_for_plugin = {
+                'schema': secret['schema'],
+                'options': {},
+                'secret_data': secret_data,
+                'filter': plugin_filter,
+                'aggregation': self._get_plugin_aggregation(aggregation + list(mask.keys())),
+                'start': params['start'],
+                'end': params['end'],
+                'granularity': params['granularity'],
+            }
+            # start and end are not part of cache key, PluginManager caches data by time segment
+            cache_params = {key: value for (key, value) in param_for_plugin.items() if key not in ['start', 'end']}
+            param_for_plugin['cache_key'] = PluginManager.make_data_cache_key(cache_params, domain_id)
+            param_for_plugin['timeout'] = timeout
+
+            # PluginManager keeps its own connector, so each worker uses a new one
+            plugin_mgr: PluginManager = self.locator.get_manager('PluginManager')
+            plugin_mgr.initialize(endpoint)
+            response = plugin_mgr.get_data(**param_for_plugin)
+            billing_data.add_response(response, secret['service_account_id'], secret['project_id'])
+            return billing_data
+        except Exception as e:
+            _LOGGER.error(f'[get_data] fail to get_data by {secret["secret_id"]}, skip..... {e}')
+            billing_data = BillingDataBuilder()
+            billing_data.add_skipped_source(secret['service_account_id'], getattr(e, 'error_code', 'ERROR_UNKNOWN'))
+            return billing_data
+
+    def _get_plugin_timeout(self):
+        """ Timeout of plugin call, within remaining deadline of request
+        """
+        plugin_conf = config.get_global('PLUGIN_GET_DATA', {})
+        timeout = plugin_conf.get('timeout', DEFAULT_PLUGIN_TIMEOUT)
+
+        request_deadline = self.transaction.get_meta('request_deadline')
+        if request_deadline:
+            time_remaining = request_deadline - time.time() - plugin_conf.get('deadline_margin',
+                                                                               DEFAULT_DEADLINE_MARGIN)
+            timeout = min(timeout, time_remaining)
+
+        return timeout
 
     def _create_result(self, df, domain_id):
-        """ From DataFrame, create sult
+        """ From DataFrame, create result
+        Column-wise, resource info is built once per index value of each level
         """
-        index = df.index.names
+        index = df.index
+        if not isinstance(index, pd.MultiIndex):
+            index = pd.MultiIndex.from_arrays([index])
+
+        level_resource_infos = [self._create_level_resource_info(name, values)
+                                for (name, values) in zip(index.names, index.levels)]
+        codes = [level_codes.tolist() for level_codes in index.codes]
+
+        # dates are sorted once
+        date_columns = sorted(df.columns)
+        costs = df[date_columns].to_numpy().tolist()
+
         result = []
-        count = 0
-        for column_name, item in df.iterrows():
-            res_info = self._create_resource_info(index, column_name)
-            data = res_info.copy()
-            sorted_cost = self._create_cost_data(item)
-            data['billing_data'] = sorted_cost
+        for row, row_costs in enumerate(costs):
+            data = {}
+            res_type = level_resource_infos[0][codes[0][row]][2]
+            query = []
+            for level in range(1, len(level_resource_infos)):
+                (q_item, key, value) = level_resource_infos[level][codes[level][row]]
+                query.append(q_item)
+                data[key] = {AGGR_MAP[key]: value}
+
+            data['resource_type'] = f'{res_type}?{"&".join(query)}' if query else res_type
+            data['billing_data'] = [{'date': date, 'cost': cost, 'currency': self.currency}
+                                    for (date, cost) in zip(date_columns, row_costs)]
             result.append(data)
-            count += 1
-        return {'results': result, 'total_count': count}
+        return {'results': result, 'total_count': len(result)}
 
     def _get_last_date(self, df):
         """ Find last date for automatic sorting
@@ -221,39 +448,15 @@ class BillingService(BaseService):
         return date_columns[-1]
 
     @staticmethod
-    def _create_resource_info(index, value):
+    def _create_level_resource_info(key, values):
         """
-        return:
-        {
-            'resource_type': 'inventory.CloudService?provider=aws&....',
-            'identity.Project': {'project_id': 'project-1234'},
-            'identity.ServiceAccount': {'service_account_id': 'sa-1234'},
+        return: one item per value of index level
+        [
+            ('identity.Project=project-1234', 'identity.Project', 'project-1234'),
             ...
-        }
+        ]
         """
-        if isinstance(value,str):
-            res_type = value + "?"
-        else:
-            # else tuple
-            res_type = value[0] + "?"
-        result = {}
-        for idx in range(len(index) - 1):
-            key = index[idx+1]
-            val = value[idx+1]
-            res_type = f"{res_type}{key}={val}&"
-            result[key] = {AGGR_MAP[key]: val}
-        result['resource_type'] = res_type[:-1]
-
-        return result
-
-    def _create_cost_data(self, cost):
-        cost_dict = cost.to_dict()
-        sorted_cost = sorted(cost_dict.items())
-        result = []
-        for item in sorted_cost:
-            value = {'date': item[0], 'cost': item[1], 'currency': self.currency }
-            result.append(value)
-        return result
+        return [(f'{key}={value}', key, value) for value in values.tolist()]
 
     def _get_aggregated_data(self, dataframe, aggregation, sort=None, limit=None):
         """ processing DataFrame
@@ -280,7 +483,8 @@ class BillingService(BaseService):
         group_by = ['resource_type'] + aggregation
 
         # 1. aggregation
-        grouped_data = dataframe.groupby(group_by).sum()
+        date_columns = list(dataframe.select_dtypes(include='number').columns)
+        grouped_data = dataframe.groupby(group_by, observed=True)[date_columns].sum()
         _LOGGER.debug(f'\n\n[1. Aggregation]{group_by}\n {grouped_data}')
         """
         ##################################################
@@ -300,6 +504,15 @@ class BillingService(BaseService):
         desc = sort.get('desc', True)
         date = sort.get('date', self._get_last_date(grouped_data))
 
+        if limit:
+            # 2-3. Top-N selection, partial sort instead of sorting all rows
+            if desc:
+                grouped_data = grouped_data.nlargest(limit, date)
+            else:
+                grouped_data = grouped_data.nsmallest(limit, date)
+            _LOGGER.debug(f'\n\n[2-3. Sort & Limit]{sort}, {limit}\n {grouped_data}')
+            return grouped_data
+
         if desc:
             ascending = False
         else:
@@ -307,19 +520,16 @@ class BillingService(BaseService):
         grouped_data = grouped_data.sort_values(by=[date], ascending=ascending)
         _LOGGER.debug(f'\n\n[2. Sort]{sort}\n {grouped_data}')
 
-        # 3. Limit
-        if limit:
-            grouped_data = grouped_data.iloc[:limit]
-            _LOGGER.debug(f'\n\n[3. Limit]{limit}\n {grouped_data}')
-
         return grouped_data
 
-    def _get_possible_service_accounts(self, domain_id, project_id=None, project_group_id=None, service_accounts=[]):
+    def _get_possible_service_accounts(self, domain_id, project_id=None, project_group_id=None, service_accounts=[],
+                                       providers=None):
         """ Find possible service account list
+        if providers is given, data sources of other providers are skipped
 
         Returns:
             {
-                endpoint: ([service_account_id], [supported_schema])
+                endpoint: ([service_account_id], [supported_schema], [supported_filter], data_source_id)
                 ...
             }
         """
@@ -335,6 +545,7 @@ class BillingService(BaseService):
             project_list = self.identity_mgr.list_projects_by_project_group_id(project_group_id, domain_id)
         else:
             project_list = self.identity_mgr.list_all_projects(domain_id)
+        project_list = set(project_list)
 
         results = {}
         query = {'filter': [{'k': 'domain_id', 'v': domain_id, 'o': 'eq'}]}
@@ -344,6 +555,9 @@ class BillingService(BaseService):
                 # Do nothing
                 continue
 
+            if providers and data_source_vo.provider not in providers:
+                continue
+
             endpoint = self.plugin_mgr.get_billing_plugin_endpoint_by_vo(data_source_vo)
             # Find all service accounts with data_source.provider
             service_accounts_by_provider = self.identity_mgr.list_service_accounts_by_provider(data_source_vo.provider, domain_id)
@@ -361,7 +575,9 @@ class BillingService(BaseService):
                 else:
                     _LOGGER.debug(f'[_get_possible_service_accounts] no match of {my_project_id}')
             data_source_dict = data_source_vo.to_dict()
-            results[endpoint] = (account_list, data_source_dict['plugin_info']['metadata']['supported_schema'])
+            metadata = data_source_dict['plugin_info']['metadata']
+            results[endpoint] = (account_list, metadata['supported_schema'], metadata.get('supported_filter', []),
+                                 data_source_vo.data_source_id)
 
         return results
 
@@ -370,7 +586,14 @@ class BillingService(BaseService):
         plugin only support, inventory.Region, inventory.CloudServiceType
         """
         supported = ['inventory.Region', 'inventory.CloudServiceType']
-        return list(set(supported) & set(aggregation))
+        # keep order of supported, plugin aggregation is a part of cache key
+        return [key for key in supported if key in aggregation]
+
+    @staticmethod
+    def _get_plugin_filter(filter, supported_filter):
+        """ Filter pushed down to plugin, only keys in supported_filter of plugin metadata
+        """
+        return {key: filter[key] for key in MASK_FILTER_KEYS if key in filter and key in supported_filter}
 
     @staticmethod
     def _check_data_source_state(data_source_vo):
@@ -379,20 +602,26 @@ class BillingService(BaseService):
         return True
 
     @staticmethod
-    def _make_cache_key(params, domain_id):
-        """ from params, create cache key
-            schema: str
-            options: dict
-            secret_data: dict
-            filter: dict
-            aggregation: list
-            start: str
-            end: str
-            granularity: str
-            cache_key: str for data caching
+    def _check_filter(filter):
+        """ check filter
+
+        {'region_code': 'ap-northeast-2'} --> {'region_code': ['ap-northeast-2']}
+        unknown keys are ignored
         """
-        cache_key = f'billing:{domain_id}:{_dict_hash(params)}'
-        return cache_key
+        new_filter = {}
+        for (key, value) in filter.items():
+            if key not in FILTER_KEYS:
+                _LOGGER.debug(f'[_check_filter] ignore unknown filter key: {key}')
+                continue
+
+            if isinstance(value, str):
+                value = [value]
+            elif not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+                raise ERROR_BILLING_REQUEST_FORMAT(key=f'filter.{key}', example='str | list of str')
+
+            new_filter[key] = value
+
+        return new_filter
 
     @staticmethod
     def _check_params(params):
@@ -425,6 +654,7 @@ class BillingService(BaseService):
 
         new_params['start'] = start_date.strftime('%Y-%m-%d')
         new_params['end'] = end_date.strftime('%Y-%m-%d')
+        new_params['filter'] = BillingService._check_filter(params.get('filter') or {})
 
         _LOGGER.debug(f'[_check_params] check start, end : \n{params} \n {new_params}')
 
@@ -0,0 +1,241 @@
+import json
+import logging
+import random
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from dateutil.relativedelta import relativedelta
+
+from spaceone.core.service import *
+from spaceone.core import config
+from spaceone.core import queue
+
+from spaceone.billing.manager.identity_manager import IdentityManager
+from spaceone.billing.manager.secret_manager import SecretManager
+from spaceone.billing.manager.data_source_manager import DataSourceManager
+from spaceone.billing.manager.plugin_manager import PluginManager
+from spaceone.billing.manager.billing_data_manager import BillingDataManager
+from spaceone.billing.lib.time_segment import make_segments, split_response, is_closed_segment
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_COLLECTOR_CONF = {
+    'queue': 'collector_q',
+    'months': 3,
+    'granularity': ['MONTHLY'],
+    'plugin_aggregations': [[]],
+    'max_concurrency': 4,
+    'jitter': 10
+}
+
+# finest plugin aggregation, BillingData store can answer every aggregation from it
+STORE_PLUGIN_AGGREGATION = ['inventory.Region', 'inventory.CloudServiceType']
+
+
+@authentication_handler
+@authorization_handler
+@mutation_handler
+@event_handler
+class CollectorService(BaseService):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.identity_mgr: IdentityManager = self.locator.get_manager('IdentityManager')
+        self.secret_mgr: SecretManager = self.locator.get_manager('SecretManager')
+        self.data_source_mgr: DataSourceManager = self.locator.get_manager('DataSourceManager')
+        self.plugin_mgr: PluginManager = self.locator.get_manager('PluginManager')
+
+    @transaction(append_meta={'authorization.scope': 'SYSTEM'})
+    def create_collect_tasks(self, params):
+        """ Push collect task of each domain which has enabled data sources
+
+        Args:
+            params (dict): {}
+
+        Returns:
+            None
+        """
+        collector_conf = self._get_collector_conf()
+        query = {'filter': [{'k': 'state', 'v': 'ENABLED', 'o': 'eq'}]}
+        (data_source_vos, total_count) = self.data_source_mgr.list_data_sources(query)
+
+        domain_ids = list(set([data_source_vo.domain_id for data_source_vo in data_source_vos]))
+        random.shuffle(domain_ids)
+
+        for domain_id in domain_ids:
+            task = self._create_collect_task(domain_id)
+            queue.put(collector_conf['queue'], json.dumps(task))
+
+        _LOGGER.debug(f'[create_collect_tasks] domains: {len(domain_ids)}')
+
+    @transaction(append_meta={'authorization.scope': 'SYSTEM'})
+    @check_required(['domain_id'])
+    def collect(self, params):
+        """ Pre-fetch recent billing data of domain
+        Plugin data cache is warmed, and BillingData store is updated if enabled
+
+        Args:
+            params (dict): {
+                'domain_id': 'str'
+            }
+
+        Returns:
+            None
+        """
+        domain_id = params['domain_id']
+        collector_conf = self._get_collector_conf()
+
+        collect_tasks = self._get_collect_tasks(domain_id)
+        if len(collect_tasks) == 0:
+            return
+
+        # shuffle, so plugin calls of data sources are interleaved
+        random.shuffle(collect_tasks)
+        max_workers = max(1, min(collector_conf['max_concurrency'], len(collect_tasks)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for collect_task in collect_tasks:
+                executor.submit(self._collect_secret, *collect_task, collector_conf, domain_id)
+
+        _LOGGER.debug(f'[collect] {domain_id}: {len(collect_tasks)} secrets')
+
+    def _get_collect_tasks(self, domain_id):
+        """ Walk enabled data sources and service accounts of domain
+
+        Returns:
+            [(data_source_id, endpoint, secret_info), ...]
+        """
+        collect_tasks = []
+        query = {
+            'filter': [
+                {'k': 'domain_id', 'v': domain_id, 'o': 'eq'},
+                {'k': 'state', 'v': 'ENABLED', 'o': 'eq'}
+            ]
+        }
+        (data_source_vos, total_count) = self.data_source_mgr.list_data_sources(query)
+        for data_source_vo in data_source_vos:
+            try:
+                endpoint = self.plugin_mgr.get_billing_plugin_endpoint_by_vo(data_source_vo)
+                supported_schema = data_source_vo.plugin_info.metadata.get('supported_schema', [])
+                service_accounts = self.identity_mgr.list_service_accounts_by_provider(data_source_vo.provider,
+                                                                                        domain_id)
+                service_account_ids = [service_account['service_account_id'] for service_account in service_accounts]
+                if len(service_account_ids) == 0:
+                    continue
+
+                secrets_info = self.secret_mgr.list_secrets_by_service_account_ids(service_account_ids,
+                                                                                   supported_schema, domain_id)
+            except Exception as e:
+                _LOGGER.error(f'[_get_collect_tasks] fail to find secrets of {data_source_vo.data_source_id}, '
+                              f'skip..... {e}')
+                continue
+
+            for secret in secrets_info.get('results', []):
+                if secret['schema'] in supported_schema:
+                    collect_tasks.append((data_source_vo.data_source_id, endpoint, secret))
+
+        return collect_tasks
+
+    def _collect_secret(self, data_source_id, endpoint, secret, collector_conf, domain_id):
+        """ Collect recent months of single secret
+        Failure is isolated, logged only
+        """
+        try:
+            secret_data = self.secret_mgr.get_secret_data(secret['secret_id'], domain_id)
+            (start, end) = self._get_collect_period(collector_conf['months'])
+
+            # PluginManager keeps its own connector, so each worker uses a new one
+            plugin_mgr: PluginManager = self.locator.get_manager('PluginManager')
+            plugin_mgr.initialize(endpoint)
+
+            for granularity in collector_conf['granularity']:
+                for aggregation in collector_conf['plugin_aggregations']:
+                    self._sleep_jitter(collector_conf['jitter'])
+                    self._get_plugin_data(plugin_mgr, secret, secret_data, aggregation, start, end, granularity,
+                                          domain_id)
+
+                if config.get_global('BILLING_DATA_STORE_ENABLED', False):
+                    self._collect_billing_data(plugin_mgr, data_source_id, secret, secret_data, start, end,
+                                               granularity, collector_conf, domain_id)
+
+        except Exception as e:
+            _LOGGER.error(f'[_collect_secret] fail to collect by {secret["secret_id"]}, skip..... {e}')
+
+    @staticmethod
+    def _get_plugin_data(plugin_mgr, secret, secret_data, aggregation, start, end, granularity, domain_id):
+        """ Same parameters with Billing.get_data, so cache is shared
+        """
+        param_for_plugin = {
+            'schema': secret['schema'],
+            'options': {},
+            'secret_data': secret_data,
+            'filter': {},
+            'aggregation': aggregation,
+            'granularity': granularity
+        }
+        cache_key = PluginManager.make_data_cache_key(param_for_plugin, domain_id)
+        return plugin_mgr.get_data(start=start, end=end, cache_key=cache_key, **param_for_plugin)
+
+    def _collect_billing_data(self, plugin_mgr, data_source_id, secret, secret_data, start, end, granularity,
+                              collector_conf, domain_id):
+        """ Save months to BillingData store, months already collected after closed are skipped
+        Data is fetched from plugin directly, so closed month is saved by data fetched after closed
+        """
+        billing_data_mgr: BillingDataManager = self.locator.get_manager('BillingDataManager')
+        plugin_data_cache_conf = config.get_global('PLUGIN_DATA_CACHE', {})
+
+        segments = make_segments(start, end, granularity)
+        closed_months = billing_data_mgr.list_closed_months(data_source_id, secret['secret_id'], granularity,
+                                                            [segment[0][:7] for segment in segments],
+                                                            domain_id)
+        segments = [segment for segment in segments if segment[0][:7] not in closed_months]
+        if len(segments) == 0:
+            return
+
+        self._sleep_jitter(collector_conf['jitter'])
+        # not from plugin data cache, cached data of open month must not be saved as closed
+        # month is closed only if it was closed before the plugin call
+        fetched_at = datetime.utcnow()
+        response = plugin_mgr.get_fresh_data(secret['schema'], {}, secret_data, {}, STORE_PLUGIN_AGGREGATION,
+                                             segments[0][0], segments[-1][1], granularity)
+
+        for (segment, segment_response) in split_response(response, segments).items():
+            billing_data_mgr.save_billing_data(segment_response, secret, data_source_id, granularity,
+                                               segment[0][:7],
+                                               is_closed_segment(segment, plugin_data_cache_conf, fetched_at),
+                                               domain_id)
+
+    def _create_collect_task(self, domain_id):
+        return {
+            'name': 'billing_collect',
+            'version': 'v1',
+            'executionEngine': 'BaseWorker',
+            'stages': [{
+                'locator': 'SERVICE',
+                'name': 'CollectorService',
+                'metadata': {'token': self.transaction.get_meta('token')},
+                'method': 'collect',
+                'params': {'params': {'domain_id': domain_id}}
+            }]
+        }
+
+    @staticmethod
+    def _get_collect_period(months):
+        """ Whole months, from (months - 1) months ago to this month
+        """
+        now = datetime.utcnow()
+        start = now + relativedelta(months=-(months - 1), day=1)
+        end = now + relativedelta(day=31)
+        return start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+
+    @staticmethod
+    def _sleep_jitter(jitter):
+        if jitter and jitter > 0:
+            time.sleep(random.uniform(0, jitter))
+
+    @staticmethod
+    def _get_collector_conf():
+        collector_conf = DEFAULT_COLLECTOR_CONF.copy()
+        collector_conf.update(config.get_global('BILLING_COLLECTOR', {}))
+        return collector_conf
@@ -9,6 +9,7 @@ from spaceone.billing.manager.repository_manager import RepositoryManager
 from spaceone.billing.manager.secret_manager import SecretManager
 from spaceone.billing.manager.plugin_manager import PluginManager
 from spaceone.billing.manager.data_source_manager import DataSourceManager
+from spaceone.billing.manager.billing_data_manager import BillingDataManager
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -164,6 +165,10 @@ class DataSourceService(BaseService):
 
         self.data_source_mgr.deregister_data_source(params['data_source_id'], params['domain_id'])
 
+        if config.get_global('BILLING_DATA_STORE_ENABLED', False):
+            billing_data_mgr: BillingDataManager = self.locator.get_manager('BillingDataManager')
+            billing_data_mgr.delete_billing_data_by_data_source_id(params['data_source_id'], params['domain_id'])
+
     @transaction(append_meta={'authorization.scope': 'DOMAIN'})
     @check_required(['data_source_id', 'domain_id'])
     def verify_plugin(self, params):
@@ -0,0 +1,165 @@
+import unittest
+
+from spaceone.billing.lib.billing_data import BillingDataBuilder, parse_resource_type
+
+RESPONSES = [
+    ('sa-1111', 'project-1111', {
+        'results': [{
+            'resource_type': 'inventory.CloudService?identity.Provider=aws&inventory.Region=ap-northeast-2',
+            'billing_data': [{'date': '2020-10', 'cost': 10.0}, {'date': '2020-11', 'cost': 12.0}]
+        }, {
+            'resource_type': 'inventory.CloudService?identity.Provider=aws&inventory.Region=us-east-1',
+            'billing_data': [{'date': '2020-10', 'cost': 1.5}, {'date': '2020-12', 'cost': 3.0}]
+        }, {
+            # no region
+            'resource_type': 'inventory.CloudService?identity.Provider=aws',
+            'billing_data': [{'date': '2020-11', 'cost': 7.0}]
+        }]
+    }),
+    ('sa-2222', 'project-1111', {
+        'results': [{
+            'resource_type': 'inventory.CloudService?identity.Provider=aws&inventory.Region=ap-northeast-2',
+            'billing_data': [{'date': '2020-10', 'cost': 20.0}, {'date': '2020-11', 'cost': 22.0}]
+        }, {
+            'resource_type': 'inventory.Server?identity.Provider=aws&inventory.Region=ap-northeast-2'
+                             '&inventory.CloudServiceType=EC2',
+            'billing_data': [{'date': '2020-12', 'cost': 5.0}]
+        }]
+    }),
+    ('sa-3333', 'project-3333', {
+        'results': [{
+            'resource_type': 'inventory.CloudService?identity.Provider=google_cloud&inventory.Region=us-east1',
+            'billing_data': [{'date': '2020-10', 'cost': 2.0}, {'date': '2020-11', 'cost': 50.0},
+                             {'date': '2020-12', 'cost': 100.0}]
+        }, {
+            'resource_type': 'inventory.CloudService?identity.Provider=google_cloud&inventory.Region=us-east1',
+            'billing_data': [{'date': '2020-12', 'cost': 0.5}]
+        }]
+    })
+]
+
+AGGREGATIONS = [
+    [],
+    ['identity.Provider'],
+    ['identity.Project'],
+    ['inventory.Region'],
+    ['inventory.CloudServiceType'],
+    ['identity.Project', 'inventory.Region'],
+    ['identity.Provider', 'identity.ServiceAccount', 'inventory.CloudServiceType']
+]
+
+
+def _make_expected(aggregation):
+    """ Aggregation of plain rows, one row per resource_type of response
+    Missing dimension value is 0 and missing date is 0.0 (same as DataFrame.fillna(0))
+    """
+    dates = sorted(set(billing_info['date'] for (service_account_id, project_id, response) in RESPONSES
+                       for result in response['results'] for billing_info in result['billing_data']))
+    expected = {}
+    for (service_account_id, project_id, response) in RESPONSES:
+        for result in response['results']:
+            row = parse_resource_type(result['resource_type'] +
+                                      f'&identity.Project={project_id}&identity.ServiceAccount={service_account_id}')
+            key = tuple([row.get(dimension, 0) for dimension in ['resource_type'] + aggregation])
+            costs = expected.setdefault(key, [0.0] * len(dates))
+            for billing_info in result['billing_data']:
+                costs[dates.index(billing_info['date'])] += billing_info['cost']
+
+    return expected
+
+
+def _aggregate(df, aggregation):
+    date_columns = sorted(df.select_dtypes(include='number').columns)
+    grouped_data = df.groupby(['resource_type'] + aggregation, observed=True)[date_columns].sum()
+    return {_to_key(index): row.tolist() for (index, row) in grouped_data.iterrows()}
+
+
+def _to_key(index):
+    return tuple(index) if isinstance(index, tuple) else (index,)
+
+
+class TestBillingDataBuilder(unittest.TestCase):
+
+    def test_aggregate_all_dimensions(self):
+        billing_data = BillingDataBuilder()
+        for (service_account_id, project_id, response) in RESPONSES:
+            billing_data.add_response(response, service_account_id, project_id)
+
+        self.assertEqual(len(billing_data), 7)
+        for aggregation in AGGREGATIONS:
+            with self.subTest(aggregation=aggregation):
+                self.assertEqual(_aggregate(billing_data.to_dataframe(), aggregation), _make_expected(aggregation))
+
+    def test_aggregate_combined_dimensions(self):
+        for aggregation in AGGREGATIONS:
+            with self.subTest(aggregation=aggregation):
+                billing_data = BillingDataBuilder(dimensions=['resource_type'] + aggregation)
+                for (service_account_id, project_id, response) in RESPONSES:
+                    billing_data.add_response(response, service_account_id, project_id)
+
+                self.assertEqual(len(billing_data), len(_make_expected(aggregation)))
+                self.assertEqual(_aggregate(billing_data.to_dataframe(), aggregation), _make_expected(aggregation))
+
+    def test_combine_rows(self):
+        billing_data = BillingDataBuilder(dimensions=['resource_type', 'identity.Project'])
+        for (service_account_id, project_id, response) in RESPONSES:
+            billing_data.add_response(response, service_account_id, project_id)
+
+        # 7 resource_types of 3 service accounts are combined into 3 rows
+        self.assertEqual(len(billing_data), 3)
+
+        df = billing_data.to_dataframe()
+        self.assertEqual(sorted(df.columns), ['2020-10', '2020-11', '2020-12', 'identity.Project', 'resource_type'])
+
+        # duplicate resource_type of sa-3333 is summed within a row
+        row = df[(df['resource_type'] == 'inventory.CloudService') & (df['identity.Project'] == 'project-3333')]
+        self.assertEqual(row[['2020-10', '2020-11', '2020-12']].values.tolist(), [[2.0, 50.0, 100.5]])
+
+    def test_mask(self):
+        billing_data = BillingDataBuilder(dimensions=['resource_type', 'identity.Project'],
+                                          mask={'inventory.Region': ['ap-northeast-2', 'us-east1']})
+        for (service_account_id, project_id, response) in RESPONSES:
+            billing_data.add_response(response, service_account_id, project_id)
+
+        # resource_types of other region (or without region) are not added
+        self.assertEqual(_aggregate(billing_data.to_dataframe(), ['identity.Project']), {
+            ('inventory.CloudService', 'project-1111'): [30.0, 34.0, 0.0],
+            ('inventory.Server', 'project-1111'): [0.0, 0.0, 5.0],
+            ('inventory.CloudService', 'project-3333'): [2.0, 50.0, 100.5]
+        })
+
+    def test_aggregate_extended_builders(self):
+        for aggregation in AGGREGATIONS:
+            with self.subTest(aggregation=aggregation):
+                billing_data = BillingDataBuilder()
+                for (service_account_id, project_id, response) in RESPONSES:
+                    partial_billing_data = BillingDataBuilder(dimensions=['resource_type'] + aggregation)
+                    partial_billing_data.add_response(response, service_account_id, project_id)
+                    billing_data.extend(partial_billing_data)
+
+                self.assertEqual(_aggregate(billing_data.to_dataframe(), aggregation), _make_expected(aggregation))
+
+    def test_extend_stale_and_skipped_sources(self):
+        billing_data = BillingDataBuilder()
+
+        stale_billing_data = BillingDataBuilder()
+        stale_billing_data.add_response(dict(RESPONSES[0][2], is_stale=True), 'sa-1111', 'project-1111')
+        billing_data.extend(stale_billing_data)
+
+        failed_billing_data = BillingDataBuilder()
+        failed_billing_data.add_skipped_source('sa-2222', 'ERROR_PLUGIN_TIMEOUT')
+        billing_data.extend(failed_billing_data)
+
+        self.assertTrue(billing_data.is_stale)
+        self.assertEqual(billing_data.skipped_sources,
+                         [{'service_account_id': 'sa-2222', 'error_code': 'ERROR_PLUGIN_TIMEOUT'}])
+        self.assertEqual(len(billing_data), 3)
+
+    def test_empty_builder(self):
+        self.assertTrue(BillingDataBuilder().to_dataframe().empty)
+
+
+if __name__ == "__main__":
+    from spaceone.core.unittest.runner import RichTestRunner
+
+    unittest.main(testRunner=RichTestRunner)
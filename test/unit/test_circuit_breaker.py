@@ -0,0 +1,90 @@
+import unittest
+from unittest.mock import patch
+
+from spaceone.billing.lib import circuit_breaker
+from spaceone.billing.lib.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = patch.object(circuit_breaker, 'time')
+        patcher.start().time.side_effect = lambda: self.now
+        self.addCleanup(patcher.stop)
+
+        self.breaker = CircuitBreaker('plugin:50051', failure_threshold=3, reset_timeout=30)
+
+    def _open(self):
+        for i in range(self.breaker.failure_threshold):
+            self.assertTrue(self.breaker.allow_request())
+            self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, OPEN)
+
+    def test_open_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertFalse(self.breaker.is_open())
+
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertTrue(self.breaker.is_open())
+        self.assertFalse(self.breaker.allow_request())
+
+    def test_success_resets_failure_count(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_half_open_to_closed(self):
+        self._open()
+
+        self.now += 29
+        self.assertFalse(self.breaker.allow_request())
+
+        self.now += 1
+        self.assertFalse(self.breaker.is_open())
+        self.assertTrue(self.breaker.allow_request())
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+
+        # single trial call
+        self.assertFalse(self.breaker.allow_request())
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_half_open_to_open(self):
+        self._open()
+
+        self.now += 30
+        self.assertTrue(self.breaker.allow_request())
+        self.breaker.record_failure()
+
+        # opened again by a single failure, for another reset_timeout
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertTrue(self.breaker.is_open())
+
+        self.now += 29
+        self.assertFalse(self.breaker.allow_request())
+
+        self.now += 1
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_get_circuit_breaker(self):
+        breaker = circuit_breaker.get_circuit_breaker('test-endpoint:50051', {'failure_threshold': 1})
+        self.assertIs(circuit_breaker.get_circuit_breaker('test-endpoint:50051'), breaker)
+        self.assertEqual(breaker.failure_threshold, 1)
+        self.assertEqual(breaker.reset_timeout, circuit_breaker.DEFAULT_RESET_TIMEOUT)
+
+
+if __name__ == "__main__":
+    from spaceone.core.unittest.runner import RichTestRunner
+
+    unittest.main(testRunner=RichTestRunner)
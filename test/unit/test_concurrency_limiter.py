@@ -0,0 +1,129 @@
+import unittest
+from unittest.mock import Mock
+
+from spaceone.core.error import ERROR_GRPC_CONNECTION
+from spaceone.billing.error import ERROR_PLUGIN_TIMEOUT, ERROR_PLUGIN_THROTTLED
+from spaceone.billing.lib.concurrency_limiter import ConcurrencyLimiter, AdaptiveConcurrencyLimiter, \
+    get_concurrency_limiter, get_global_concurrency_limiter, SUCCESS, OVERLOADED, IGNORED
+from spaceone.billing.manager.plugin_manager import PluginManager
+
+
+class TestConcurrencyLimiter(unittest.TestCase):
+
+    def test_acquire_timeout(self):
+        limiter = ConcurrencyLimiter(2)
+        self.assertTrue(limiter.acquire(0.1))
+        self.assertTrue(limiter.acquire(0.1))
+        self.assertFalse(limiter.acquire(0.1))
+
+        limiter.release()
+        self.assertTrue(limiter.acquire(0.1))
+        self.assertEqual(limiter.in_flight, 2)
+
+
+class TestAdaptiveConcurrencyLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.limiter = AdaptiveConcurrencyLimiter('plugin:50051', initial_limit=4, min_limit=1, max_limit=6,
+                                                  backoff_ratio=0.5)
+
+    def _call(self, outcome):
+        self.assertTrue(self.limiter.acquire(0.1))
+        self.limiter.release(outcome)
+
+    def test_additive_increase(self):
+        # about +1 per round of limit calls
+        for i in range(4):
+            self._call(SUCCESS)
+
+        self.assertGreater(self.limiter.limit, 4.9)
+        self.assertLess(self.limiter.limit, 5)
+
+        for i in range(100):
+            self._call(SUCCESS)
+
+        self.assertEqual(self.limiter.limit, 6)
+
+    def test_multiplicative_decrease(self):
+        self._call(OVERLOADED)
+        self.assertEqual(self.limiter.limit, 2)
+
+        self._call(OVERLOADED)
+        self._call(OVERLOADED)
+        self.assertEqual(self.limiter.limit, 1)
+
+    def test_ignored(self):
+        self._call(IGNORED)
+        self.assertEqual(self.limiter.limit, 4)
+
+    def test_decreased_limit(self):
+        for i in range(4):
+            self.assertTrue(self.limiter.acquire(0.1))
+
+        self.limiter.release(OVERLOADED)
+        self.limiter.release(OVERLOADED)
+
+        # 2 calls in flight with limit 1
+        self.assertEqual(self.limiter.limit, 1)
+        self.assertFalse(self.limiter.acquire(0.1))
+
+        self.limiter.release(IGNORED)
+        self.limiter.release(IGNORED)
+        self.assertTrue(self.limiter.acquire(0.1))
+
+
+class TestPluginManagerSlots(unittest.TestCase):
+
+    def _get_plugin_data(self, endpoint, side_effect):
+        plugin_mgr = PluginManager.__new__(PluginManager)
+        plugin_mgr.billing_plugin_connector = Mock(endpoint=endpoint)
+        plugin_mgr.billing_plugin_connector.get_data.side_effect = side_effect
+
+        return plugin_mgr._get_plugin_data('aws_access_key', {}, {}, {}, [], '2020-10-01', '2020-11-30',
+                                           'MONTHLY', timeout=1)
+
+    def _assert_released(self, endpoint, limit):
+        endpoint_limiter = get_concurrency_limiter(endpoint)
+        self.assertEqual(endpoint_limiter.in_flight, 0)
+        self.assertEqual(get_global_concurrency_limiter().in_flight, 0)
+        self.assertEqual(endpoint_limiter.limit, limit)
+
+    def test_release_on_success(self):
+        endpoint = 'success:50051'
+        self.assertEqual(self._get_plugin_data(endpoint, [{'results': []}]), {'results': []})
+        self._assert_released(endpoint, 8 + 1 / 8)
+
+    def test_release_on_timeout(self):
+        for (endpoint, error) in [('timeout:50051', ERROR_PLUGIN_TIMEOUT(endpoint='timeout:50051', timeout=1)),
+                                  ('connection:50051', ERROR_GRPC_CONNECTION(channel='connection:50051',
+                                                                             message='unavailable'))]:
+            with self.subTest(error=error.error_code):
+                with self.assertRaises(error.__class__):
+                    self._get_plugin_data(endpoint, error)
+
+                self._assert_released(endpoint, 4)
+
+    def test_release_on_other_error(self):
+        endpoint = 'error:50051'
+        with self.assertRaises(KeyError):
+            self._get_plugin_data(endpoint, KeyError('secret_data'))
+
+        self._assert_released(endpoint, 8)
+
+    def test_throttled(self):
+        endpoint = 'throttled:50051'
+        endpoint_limiter = get_concurrency_limiter(endpoint, {'initial_limit': 1})
+        self.assertTrue(endpoint_limiter.acquire())
+        try:
+            with self.assertRaises(ERROR_PLUGIN_THROTTLED):
+                self._get_plugin_data(endpoint, [{'results': []}])
+        finally:
+            endpoint_limiter.release()
+
+        self._assert_released(endpoint, 1)
+
+
+if __name__ == "__main__":
+    from spaceone.core.unittest.runner import RichTestRunner
+
+    unittest.main(testRunner=RichTestRunner)
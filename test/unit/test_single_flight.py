@@ -0,0 +1,107 @@
+import threading
+import time
+import unittest
+
+from spaceone.billing.lib.single_flight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        self.single_flight = SingleFlight()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.call_count = 0
+
+    def _start_leader(self, func, results):
+        def _leader():
+            try:
+                results['leader'] = self.single_flight.do('key', func)
+            except Exception as e:
+                results['leader'] = e
+
+        thread = threading.Thread(target=_leader)
+        thread.start()
+        self.assertTrue(self.started.wait(5))
+        return thread
+
+    def _start_follower(self, results, name, wait_timeout=5):
+        def _follower():
+            try:
+                results[name] = self.single_flight.do('key', self._fail, wait_timeout=wait_timeout)
+            except Exception as e:
+                results[name] = e
+
+        thread = threading.Thread(target=_follower)
+        thread.start()
+        return thread
+
+    def _release_leader(self):
+        # followers are waiting for in-flight call of leader
+        time.sleep(0.2)
+        self.release.set()
+
+    def _blocking_call(self, error=None):
+        self.call_count += 1
+        self.started.set()
+        self.release.wait(5)
+        if error:
+            raise error
+        return {'results': []}
+
+    def _fail(self):
+        raise AssertionError('follower must not call func')
+
+    def test_follower_shares_result(self):
+        results = {}
+        leader = self._start_leader(self._blocking_call, results)
+        followers = [self._start_follower(results, f'follower-{i}') for i in range(3)]
+
+        self._release_leader()
+        for thread in [leader] + followers:
+            thread.join(5)
+
+        self.assertEqual(self.call_count, 1)
+        for name in ['leader', 'follower-0', 'follower-1', 'follower-2']:
+            self.assertEqual(results[name], {'results': []})
+
+    def test_leader_failure(self):
+        error = RuntimeError('plugin failed')
+        results = {}
+        leader = self._start_leader(lambda: self._blocking_call(error), results)
+        follower = self._start_follower(results, 'follower')
+
+        self._release_leader()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual(self.call_count, 1)
+        self.assertIs(results['leader'], error)
+        self.assertIs(results['follower'], error)
+
+        # failed call is not kept, next caller calls again
+        self.assertEqual(self.single_flight.do('key', lambda: 'retried'), 'retried')
+
+    def test_follower_timeout(self):
+        results = {}
+        leader = self._start_leader(self._blocking_call, results)
+        follower = self._start_follower(results, 'follower', wait_timeout=0.1)
+        follower.join(5)
+
+        self.assertIsInstance(results['follower'], TimeoutError)
+
+        # leader is not affected by timeout of follower
+        self.release.set()
+        leader.join(5)
+        self.assertEqual(results['leader'], {'results': []})
+        self.assertEqual(self.call_count, 1)
+
+    def test_different_keys(self):
+        self.assertEqual(self.single_flight.do('key-1', lambda: 1), 1)
+        self.assertEqual(self.single_flight.do('key-2', lambda: 2), 2)
+
+
+if __name__ == "__main__":
+    from spaceone.core.unittest.runner import RichTestRunner
+
+    unittest.main(testRunner=RichTestRunner)
@@ -0,0 +1,39 @@
+import unittest
+
+from spaceone.billing.lib.time_segment import make_segments, split_response
+
+
+def _make_response(dates):
+    return {
+        'results': [{
+            'resource_type': 'inventory.CloudService?identity.Provider=aws',
+            'billing_data': [{'date': date, 'cost': 10.0, 'currency': 'USD'} for date in dates]
+        }],
+        'total_count': 1
+    }
+
+
+class TestTimeSegment(unittest.TestCase):
+
+    def test_split_monthly_response(self):
+        segments = make_segments('2020-10-15', '2020-11-30', 'MONTHLY')
+        self.assertEqual(segments, [('2020-10-15', '2020-10-31'), ('2020-11-01', '2020-11-30')])
+
+        segment_responses = split_response(_make_response(['2020-10', '2020-11']), segments)
+        for segment, date in zip(segments, ['2020-10', '2020-11']):
+            billing_data = segment_responses[segment]['results'][0]['billing_data']
+            self.assertEqual([billing_info['date'] for billing_info in billing_data], [date])
+
+    def test_split_yearly_response(self):
+        segments = make_segments('2020-01-01', '2021-12-31', 'YEARLY')
+        self.assertEqual(segments, [('2020-01-01', '2021-12-31')])
+
+        response = _make_response(['2020', '2021'])
+        segment_responses = split_response(response, segments)
+        self.assertEqual(segment_responses, {segments[0]: response})
+
+
+if __name__ == "__main__":
+    from spaceone.core.unittest.runner import RichTestRunner
+
+    unittest.main(testRunner=RichTestRunner)